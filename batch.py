@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import time
+import traceback
+import yaml
+
+from lib.api import parse_directory
+from lib.parsers import Parallel
+from lib.parsers.Cache import ParseCache
+from lib.output.Logger import Logger
+
+from dotenv import load_dotenv
+load_dotenv()
+
+
+def run_project(l, project, output_folder, parse_cache):
+    """
+    Parses, checks and reports on a single project from the manifest, returning its exit code and report details.
+    """
+
+    if parse_cache is not None:
+        # The cache is shared, but its hit counts are reported per project
+        parse_cache.hits = parse_cache.misses = 0
+
+    result = parse_directory(
+        project["input"],
+        config = project.get("config"),
+        output = project.get("output", os.path.join(output_folder, project["name"])),
+        cache = parse_cache,
+        metadata = project.get("metadata", {}),
+        logger = l
+    )
+
+    return {
+        "exit_code": result.exit_code,
+        "issue_count": result.metadata.payload.get("issue_count", 0),
+        "reports": result.reports
+    }
+
+
+if __name__ == "__main__":
+
+    print()
+    print("Security Output Parser - batch")
+    print("Parses the tool output of every project in a manifest in a single process\n")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        help="The manifest (a yaml file) listing each project's input directory, config file and metadata",
+        required=True
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="The directory to store each project's output (in a directory named after it) and the batch summary to",
+        default="."
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="Sets verbose mode",
+        action="store_true"
+    )
+
+    arguments = parser.parse_args()
+
+    l = Logger(arguments.verbose)
+
+    with open(arguments.manifest) as manifest_file:
+        manifest = yaml.load(manifest_file, Loader=yaml.FullLoader)
+
+    projects = manifest.get("projects", [])
+    output_folder = os.path.abspath(arguments.output)
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Worker processes and parse cache entries are shared by every project (S3 and JIRA clients are shared automatically)
+    Parallel.start_shared_pool(int(manifest.get("workers", os.cpu_count() or 1)))
+
+    parse_cache = None
+    if manifest.get("cache"):
+        parse_cache = ParseCache(l, manifest["cache"])
+
+    summary = []
+    start = time.time()
+
+    try:
+        for project in projects:
+            l.info(f"===== {project['name']} =====")
+            print()
+
+            project_start = time.time()
+            try:
+                result = run_project(l, project, output_folder, parse_cache)
+                result["error"] = None
+            except (Exception, SystemExit) as e:
+                # One broken project shouldn't stop the rest of the batch, even if something in it calls exit()
+                l.error(f"{project['name']} could not be parsed: {e!r}")
+                if arguments.verbose:
+                    traceback.print_exc()
+                result = {"exit_code": -1, "issue_count": 0, "reports": [], "error": repr(e)}
+
+            result["name"] = project["name"]
+            result["duration"] = round(time.time() - project_start, 3)
+            summary.append(result)
+            print()
+    finally:
+        Parallel.shutdown_shared_pool()
+
+    summary_location = os.path.join(output_folder, f"batch_summary_{int(start)}.json")
+    with open(summary_location, "w") as summary_file:
+        json.dump({"duration": round(time.time() - start, 3), "projects": summary}, summary_file, indent=2)
+
+    l.info(f"Batch summary written to {summary_location}")
+    for result in summary:
+        status = f"error: {result['error']}" if result["error"] else f"{result['issue_count']} issue(s), exit code {result['exit_code']}"
+        l.info(f"> {result['name']}: {status}")
+
+    # Any project that couldn't be parsed fails the batch outright; otherwise exit with the highest project exit code
+    exit_codes = [result["exit_code"] for result in summary]
+    exit_code = -1 if -1 in exit_codes else max(exit_codes, default=0)
+
+    if exit_code != 0:
+        l.warning("Exiting script with non-zero value")
+        l.warning(f"The exit code is {exit_code}")
+        exit(exit_code)
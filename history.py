@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import argparse
+import datetime
+import sys
+
+from lib.output import History
+
+
+def output(rows, timestamp_column):
+    for row in rows:
+        columns = [str(column) for column in row]
+        # Make the run's timestamp readable
+        columns[timestamp_column] = datetime.datetime.fromtimestamp(row[timestamp_column], datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        print("\t".join(columns))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Queries the run-history database created with the output.history setting"
+    )
+    parser.add_argument(
+        "-d",
+        "--database",
+        help="Location of the run-history database",
+        required=True
+    )
+
+    queries = parser.add_subparsers(dest="query", required=True)
+
+    first_seen = queries.add_parser("first-seen", help="The first run an issue was reported in")
+    first_seen.add_argument("uid")
+
+    last_seen = queries.add_parser("last-seen", help="The latest run an issue was reported in")
+    last_seen.add_argument("uid")
+
+    trend = queries.add_parser("trend", help="The number of issues reported in each run of a repository")
+    trend.add_argument("repository")
+    trend.add_argument("-b", "--branch", default=None)
+    trend.add_argument("-s", "--severity", default=None)
+
+    branches = queries.add_parser("branches", help="The number of issues reported in the latest run of each branch of a repository")
+    branches.add_argument("repository")
+    branches.add_argument("-s", "--severity", default=None)
+
+    arguments = parser.parse_args()
+
+    connection = History.connect(arguments.database)
+
+    timestamp_column = 0
+    if arguments.query == "first-seen":
+        rows = [History.first_seen(connection, arguments.uid)]
+    elif arguments.query == "last-seen":
+        rows = [History.last_seen(connection, arguments.uid)]
+    elif arguments.query == "trend":
+        rows = History.trend(connection, arguments.repository, arguments.branch, arguments.severity)
+    else:
+        rows = History.branches(connection, arguments.repository, arguments.severity)
+        timestamp_column = 2
+
+    if len(rows) == 0 or rows[0] is None:
+        print("No matching runs found")
+        sys.exit(1)
+
+    output(rows, timestamp_column)
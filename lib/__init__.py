@@ -0,0 +1,4 @@
+import logging
+
+# Programs embedding the parser (see lib.api) configure logging themselves; main.py does so through Logger
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -0,0 +1,303 @@
+import copy
+import os
+
+from pathlib import Path
+
+from lib.exceptions import NoInputError
+from lib.input.ConfigHandler import ConfigHandler
+from lib.input.Loader import load_from_folder, select_shard
+from lib.input.Pipe import open_pipe
+from lib.input import Scope
+from lib.input.Watcher import DEFAULT_MARKER, DEFAULT_TIMEOUT, Watcher
+from lib.issues.Allowlist import Allowlist
+from lib.issues.Baseline import Baseline
+from lib.issues.IssueHolder import IssueHolder
+from lib.parsers.Cache import ParseCache
+from lib.parsers.CoreParser import CoreParser
+from lib.output.Logger import Logger
+from lib.output.Metadata import Metadata
+from lib.output.Reporter import Reporter
+from lib.output.Sinks import compressors
+
+# Metadata values a caller can set, in place of the CircleCI environment variables
+METADATA_OVERRIDES = ["username", "project_username", "repository", "branch", "commit_hash", "job", "working_directory", "repository_url"]
+
+
+class Result:
+    """
+    The outcome of parsing a directory of tool output.
+    """
+
+    def __init__(self, issue_holder, exit_code, metadata, reports):
+        self.issue_holder = issue_holder
+        # The exit code main.py would exit with (0 unless the fail threshold was met)
+        self.exit_code = exit_code
+        self.metadata = metadata
+        # The reports (and metadata file) written to the output directory
+        self.reports = reports
+
+
+    @property
+    def issues(self):
+        """
+        The deduplicated issues found. Streamed reports (output.stream) don't keep their issues, so this is then empty.
+        """
+
+        return self.issue_holder.iter_deduplicated()
+
+
+    def __iter__(self):
+        return self.issues
+
+
+def apply_overrides(m, overrides):
+    """
+    Sets a run's metadata from the given values.
+    """
+
+    for key, value in overrides.items():
+        if key not in METADATA_OVERRIDES:
+            raise ValueError(f"Unsupported metadata override {key} - expected one of {', '.join(METADATA_OVERRIDES)}")
+        setattr(m, key, str(value))
+        m.payload[key] = str(value)
+
+    # Build the repository URL the same way CircleCI builds get one, unless it was given
+    if "repository_url" not in overrides and "repository" in overrides:
+        m.repository_url = f"https://github.com/{m.project_username}/{m.repository}"
+        m.payload["repository_url"] = m.repository_url
+
+
+def parse_directory(
+    path,
+    config = None,
+    output = None,
+    baseline = "",
+    changed_files = "",
+    diff_base = "",
+    cache = None,
+    metadata = None,
+    shard = False,
+    watch = False,
+    watch_marker = DEFAULT_MARKER,
+    watch_timeout = DEFAULT_TIMEOUT,
+    pipes = None,
+    tee = None,
+    allowlist = None,
+    logger = None
+):
+    """
+    Parses the tool output in a directory and checks it as main.py would, returning a Result rather than exiting.
+
+    config is the location of a configuration file (<path>/.security/parser.yml by default), a dictionary of the same
+    settings, or an already loaded ConfigHandler (which isn't modified, so it can be shared by many calls). allowlist can
+    be an Allowlist compiled from the same config, to be shared by many calls rather than compiled for each. Reports are only written (and uploaded, if the config asks for it) when an output directory is given. cache
+    is a directory or a ParseCache, which can be shared by many calls. metadata overrides the CircleCI environment
+    variables, i.e. {"repository": "api", "commit_hash": "2f1c0e7"}.
+
+    With shard set, only this container's share of the files is parsed and saved to the output directory for merge.py,
+    without being checked.
+
+    With watch set, files are parsed as the scanners finish writing them, rather than all being loaded up front; the
+    report is finalised once watch_marker is written to the directory, or after watch_timeout seconds.
+
+    pipes is a list of (tool, source) pairs, i.e. [("trivy", "-")], to parse tool output straight from stdin or a named
+    pipe, alongside any files in path (which can then be None). With tee set to a compression ("gzip" or "xz"), a
+    compressed copy of each pipe's output is saved to the output directory as it's read, to be uploaded in its place.
+
+    Raises a lib.exceptions.ParserError if the configuration is invalid or no tool output is found.
+    """
+
+    if shard and output is None:
+        raise ValueError("An output directory is needed to save a shard's partial results to")
+    if shard and watch:
+        raise ValueError("Shards need every file up front to choose their share, so can't be watched for")
+    if path is None and not pipes:
+        raise ValueError("Either a directory or a pipe to read tool output from is needed")
+    if pipes and (shard or watch):
+        raise ValueError("Piped tool output can't be sharded or watched for")
+    if pipes and tee is not None and (output is None or tee not in compressors):
+        raise ValueError(f"Keeping a copy of piped output needs an output directory and one of {', '.join(compressors)}")
+    for tool, _ in pipes or []:
+        if tool != "sarif" and tool not in CoreParser.parsable_tools.values():
+            raise ValueError(f"Unsupported tool {tool} - expected sarif or one of {', '.join(CoreParser.parsable_tools.values())}")
+
+    l = logger if logger is not None else Logger(console=False)
+
+    if config is None:
+        config = os.path.join(path or ".", ".security", "parser.yml")
+    if isinstance(config, ConfigHandler):
+        config = copy.copy(config)
+    else:
+        config = ConfigHandler(l, config)
+    config.baseline = baseline
+
+    m = Metadata(l, config)
+    if metadata:
+        apply_overrides(m, metadata)
+
+    if output is not None:
+        m.output_path = os.path.abspath(output)
+        os.makedirs(m.output_path, exist_ok=True)
+
+    issue_holder = IssueHolder(l)
+
+    # Allowlisted findings are skipped by the parsers before they're built
+    allowlist = Allowlist(config.allowlisted_issues) if allowlist is None else allowlist.share()
+    if not allowlist.is_empty():
+        issue_holder.allowlist = allowlist
+
+    # Limit findings in files to the ones a pull request changed
+    if changed_files or diff_base:
+        if not m.is_pr:
+            l.info("Not a pull request build - reporting findings in all files")
+        elif changed_files:
+            issue_holder.scope = Scope.from_file(changed_files, m.working_directory)
+        else:
+            issue_holder.scope = Scope.from_git(diff_base, m.working_directory)
+
+        if issue_holder.scope is not None:
+            l.info(f"Limiting findings to {len(issue_holder.scope.paths)} changed file(s)")
+            l.spacer()
+
+    if watch:
+        # Files are parsed as the watcher finds them; m.input_files fills up as they're found
+        watcher = Watcher(l, path, watch_marker, watch_timeout)
+        m.input_files = watcher.loaded_files
+        input_files = iter(watcher)
+    else:
+        m.input_files = []
+        if path is not None:
+            m.input_files = load_from_folder(l, path)
+
+        for tool, source in pipes or []:
+            m.input_files.append(open_pipe(l, tool, source, m.output_path if tee else "", tee))
+
+        input_files = m.input_files
+
+    parser = CoreParser(l, m, issue_holder)
+    if isinstance(cache, ParseCache):
+        parser.cache = cache
+    elif cache:
+        parser.cache = ParseCache(l, cache)
+
+    try:
+        if shard:
+            # Only parse this container's share of the files, saving the issues for merge.py to report on
+            m.input_files = select_shard(l, m.input_files, m.node_index, m.node_total, path)
+            parser.parse(m.input_files)
+
+            partial_location = f"{m.output_path}/parser_partial_{m.node_index}.snapshot"
+            issue_holder.save_snapshot(partial_location)
+            l.info(f"Saved {issue_holder.size()} issue(s) to {partial_location}")
+            return Result(issue_holder, 0, m, [partial_location])
+
+        baseline = None
+        if m.baseline:
+            baseline = Baseline(l, m, m.baseline)
+
+        if output is None:
+            parser.parse(input_files)
+            exit_code = parser.check(config.allowlisted_issues, config.fail_threshold, baseline)
+            return Result(issue_holder, exit_code, m, [])
+
+        reporter = Reporter(l, m, issue_holder)
+
+        if m.output.get("stream", False):
+            # Issues flow straight from the parsers to the report
+            issues = parser.stream(input_files, config.allowlisted_issues, config.fail_threshold, baseline)
+            creation_success = reporter.stream_report(issues)
+            exit_code = parser.exit_code
+        else:
+            parser.parse(input_files)
+            exit_code = parser.check(config.allowlisted_issues, config.fail_threshold, baseline)
+
+            # Generate output now
+            creation_success = reporter.create_report()
+
+        # Compressed copies of piped output are only complete once the pipes are closed
+        if pipes:
+            for input_file in m.input_files:
+                input_file.close()
+
+        reporter.generate_metadata_file()
+
+        # If we have a report and we're allowed to upload to AWS, then do it
+        if creation_success and config.upload_to_aws:
+            reporter.upload_to_s3()
+
+        return Result(issue_holder, exit_code, m, reporter.report_locations + [reporter.metadata_filepath])
+    finally:
+        for input_file in m.input_files:
+            input_file.close()
+
+
+def merge_partials(
+    partials,
+    config = ".security/parser.yml",
+    output = None,
+    path = None,
+    baseline = "",
+    metadata = None,
+    logger = None
+):
+    """
+    Combines the partial results saved by each shard of parse_directory (shard=True) into a single checked report, as
+    merge.py would, returning a Result rather than exiting.
+
+    partials is the directory the parser_partial_*.snapshot files were collected in. The original tool output is only
+    loaded from path if it's given, to be uploaded alongside the report. The other options are as for parse_directory.
+
+    Raises a lib.exceptions.ParserError if the configuration is invalid or no partial results are found.
+    """
+
+    l = logger if logger is not None else Logger(console=False)
+
+    config = ConfigHandler(l, config)
+    config.baseline = baseline
+
+    m = Metadata(l, config)
+    if metadata:
+        apply_overrides(m, metadata)
+
+    if output is not None:
+        m.output_path = os.path.abspath(output)
+        os.makedirs(m.output_path, exist_ok=True)
+
+    locations = sorted(Path(partials).glob("parser_partial_*.snapshot"))
+    if len(locations) == 0:
+        raise NoInputError("No partial results were found - did you target the right directory?")
+
+    # The original tool output is only needed if it is to be uploaded
+    m.input_files = []
+    if path:
+        m.input_files = load_from_folder(l, path)
+
+    try:
+        issue_holder = IssueHolder(l)
+        for location in locations:
+            issue_holder.load_snapshot(str(location))
+        l.info(f"Loaded {issue_holder.size()} issue(s) from {len(locations)} partial result(s)")
+        l.spacer()
+
+        parser = CoreParser(l, m, issue_holder)
+
+        baseline = None
+        if m.baseline:
+            baseline = Baseline(l, m, m.baseline)
+
+        exit_code = parser.check(config.allowlisted_issues, config.fail_threshold, baseline)
+
+        if output is None:
+            return Result(issue_holder, exit_code, m, [])
+
+        reporter = Reporter(l, m, issue_holder)
+        creation_success = reporter.create_report()
+        reporter.generate_metadata_file()
+
+        if creation_success and config.upload_to_aws:
+            reporter.upload_to_s3()
+
+        return Result(issue_holder, exit_code, m, reporter.report_locations + [reporter.metadata_filepath])
+    finally:
+        for input_file in m.input_files:
+            input_file.close()
@@ -1,3 +1,7 @@
+import hashlib
+import os
+
+
 
 def an(word):
     triggers = ["a", "e", "i", "o"]
@@ -8,6 +12,55 @@ def an(word):
         return "a " + word
 
 
+def line_range(line):
+    """
+    Converts a reported line (i.e. 12, "12" or gosec's "12-14") into a [start, end] list.
+    """
+
+    start, _, end = str(line).partition("-")
+    try:
+        start = int(start)
+        end = int(end) if end != "" else start
+    except ValueError:
+        return [0, 0]
+    return [start, end]
+
+
+def relative_path(path, working_directory):
+    """
+    Strips any URI scheme and a leading working directory (i.e. CIRCLE_WORKING_DIRECTORY, as given or with ~ expanded)
+    from a path reported by a tool, so paths from different tools can be compared. Only whole leading path components are
+    stripped, so a path that merely contains the working directory's name is left alone.
+    """
+
+    if path.startswith("file://"):
+        path = path[len("file://"):]
+
+    if working_directory != "":
+        for prefix in (working_directory, os.path.expanduser(working_directory)):
+            prefix = prefix.rstrip("/") + "/"
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+                break
+
+    if path.startswith("./"):
+        path = path[2:]
+
+    return path
+
+
+def file_digest(path):
+    """
+    Returns the sha256 digest of a file's contents, read in chunks.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as input_file:
+        for chunk in iter(lambda: input_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 CVSS_LOW_MIN = 0.1
 CVSS_LOW_MAX = 3.9
 CVSS_MED_MIN = 4.0
@@ -19,7 +72,7 @@ CVSS_CRIT_MAX = 10.0
 
 
 def convert_cvss(cvss):
-    cvss = int(cvss)
+    cvss = float(cvss)
     if CVSS_LOW_MIN <= cvss <= CVSS_LOW_MAX:
         return "low"
     elif CVSS_MED_MIN <= cvss <= CVSS_MED_MAX:
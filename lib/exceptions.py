@@ -0,0 +1,16 @@
+class ParserError(Exception):
+    """
+    Raised when a parse can't go ahead. Scripts log it and exit with -1; programs using lib.api can handle it instead.
+    """
+
+
+class ConfigError(ParserError):
+    """
+    Raised when the configuration file is invalid.
+    """
+
+
+class NoInputError(ParserError):
+    """
+    Raised when no supported tool output is found in the input directory.
+    """
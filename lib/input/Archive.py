@@ -0,0 +1,257 @@
+import fnmatch
+import gzip
+import hashlib
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+
+# Archives that tool output can be read from without being extracted, mapped to the mode tarfile opens them with
+# (zip archives are read with zipfile). Compressed tarballs can't be read from an offset, so they're streamed ("|")
+ARCHIVE_TYPES = {
+    ".tar": "r:",
+    ".tar.gz": "r|gz",
+    ".tgz": "r|gz",
+    ".zip": None
+}
+
+# Tool output members of an archive, and compressed tool output files
+MEMBER_PATTERNS = ("results_*.json", "results_*.sarif", "results_*.json.gz", "results_*.sarif.gz")
+COMPRESSED_PATTERNS = ("**/results_*.json.gz", "**/results_*.sarif.gz")
+
+READ_SIZE = 1024 * 1024
+
+
+def archive_type(path):
+    """
+    Returns the extension of a supported archive, or None if the path isn't one.
+    """
+
+    for extension in sorted(ARCHIVE_TYPES, key=len, reverse=True):
+        if path.endswith(extension):
+            return extension
+    return None
+
+
+def is_member(name):
+    return any(fnmatch.fnmatch(os.path.basename(name), pattern) for pattern in MEMBER_PATTERNS)
+
+
+class SpooledMember(io.RawIOBase):
+    """
+    Reads one member's bytes back from a spool (a temporary file holding several members), through its own position.
+    """
+
+    def __init__(self, spool, offset, size):
+        self.spool = spool
+        self.offset = offset
+        self.size = size
+        self.position = 0
+
+
+    def readable(self):
+        return True
+
+
+    def readinto(self, buffer):
+        length = min(len(buffer), self.size - self.position)
+        if length <= 0:
+            return 0
+
+        data = os.pread(self.spool.fileno(), length, self.offset + self.position)
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+class ArchiveMember:
+    """
+    Tool output inside an archive, or in a compressed (.gz) file, read without being extracted to disk.
+
+    It's only opened when first read, and then with its own handle on the archive. Members of .tar and .zip archives are
+    read directly from their offset. Compressed tarballs can only be read from the start, so their tool output members are
+    copied to a temporary spool in one sequential pass when the archive is listed, and read back from there.
+
+    Its name is the archive's path followed by the member's (without any .gz suffix), i.e. artifacts.tar.gz/scans/results_trivy.json,
+    so it reaches the same parser as the file would have. source is the file on disk it's read from (i.e. to upload).
+    """
+
+    def __init__(self, source, member = None, size = 0, spool = None, offset = 0, digest = None):
+        self.source = source
+        # A TarInfo, a ZipInfo, or None for a standalone compressed file
+        self.member = member
+        self.size = size
+
+        # Where a compressed tarball's member was copied to, and the digest taken while copying it
+        self.spool = spool
+        self.offset = offset
+        self.stored_digest = digest
+
+        if member is None:
+            self.member_name = ""
+            location = source
+        else:
+            self.member_name = member.name if isinstance(member, tarfile.TarInfo) else member.filename
+            location = f"{source}/{os.path.normpath(self.member_name)}"
+
+        self.compressed = location.endswith(".gz")
+        self.name = location[:-len(".gz")] if self.compressed else location
+
+        self.archive = None
+        self.raw = None
+        self.stream = None
+        self.closed = False
+
+
+    def __open_raw(self):
+        """
+        Opens the member's stored bytes, with a new handle on its archive.
+        """
+
+        if self.member is None:
+            return None, open(self.source, "rb")
+
+        if self.spool is not None:
+            return None, io.BufferedReader(SpooledMember(self.spool, self.offset, self.size), READ_SIZE)
+
+        if isinstance(self.member, tarfile.TarInfo):
+            archive = tarfile.open(self.source, ARCHIVE_TYPES[archive_type(self.source)])
+            return archive, archive.extractfile(self.member)
+
+        archive = zipfile.ZipFile(self.source)
+        return archive, archive.open(self.member)
+
+
+    def __stream(self):
+        if self.stream is None:
+            if self.closed:
+                raise ValueError("I/O operation on closed file.")
+
+            self.archive, self.raw = self.__open_raw()
+            raw = gzip.GzipFile(fileobj=self.raw, mode="rb") if self.compressed else self.raw
+            self.stream = io.TextIOWrapper(raw, encoding="utf-8")
+
+        return self.stream
+
+
+    def read(self, size = -1):
+        return self.__stream().read(size)
+
+
+    def readline(self, size = -1):
+        return self.__stream().readline(size)
+
+
+    def readlines(self, hint = -1):
+        return self.__stream().readlines(hint)
+
+
+    def __iter__(self):
+        return iter(self.__stream())
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+    def digest(self):
+        """
+        Returns a digest of the member's stored bytes (i.e. to key the parse cache), read through a separate handle.
+        """
+
+        if self.stored_digest is not None:
+            return self.stored_digest
+
+        digest = hashlib.sha256()
+        digest.update(self.member_name.encode("utf-8"))
+
+        archive, raw = self.__open_raw()
+        try:
+            for chunk in iter(lambda: raw.read(READ_SIZE), b""):
+                digest.update(chunk)
+        finally:
+            raw.close()
+            if archive is not None:
+                archive.close()
+
+        return digest.hexdigest()
+
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.raw.close()
+            self.stream = self.raw = None
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        self.closed = True
+
+
+def spool_archive(location, mode):
+    """
+    Copies the tool output members of a compressed tarball to a temporary spool in a single sequential pass, so each is
+    only decompressed once, taking their digests on the way.
+    """
+
+    spool = tempfile.TemporaryFile()
+    members = []
+
+    with tarfile.open(location, mode) as archive:
+        for member in archive:
+            if not member.isreg() or not is_member(member.name):
+                continue
+
+            digest = hashlib.sha256()
+            digest.update(member.name.encode("utf-8"))
+
+            offset = spool.tell()
+            raw = archive.extractfile(member)
+            for chunk in iter(lambda: raw.read(READ_SIZE), b""):
+                digest.update(chunk)
+                spool.write(chunk)
+
+            members.append(ArchiveMember(location, member, member.size, spool, offset, digest.hexdigest()))
+
+    spool.flush()
+    return members
+
+
+def load_archive(location):
+    """
+    Returns an ArchiveMember for each tool output file in an archive, in archive order. Nothing is extracted, other than
+    the tool output members of a compressed tarball, which are spooled to a temporary file as it's decompressed (once).
+    """
+
+    mode = ARCHIVE_TYPES[archive_type(location)]
+
+    if mode is None:
+        with zipfile.ZipFile(location) as archive:
+            return [
+                ArchiveMember(location, member, member.file_size)
+                for member in archive.infolist()
+                if not member.is_dir() and is_member(member.filename)
+            ]
+
+    if "|" in mode:
+        return spool_archive(location, mode)
+
+    with tarfile.open(location, mode) as archive:
+        return [
+            ArchiveMember(location, member, member.size)
+            for member in archive.getmembers()
+            if member.isreg() and is_member(member.name)
+        ]
+
+
+def load_compressed(location):
+    """
+    Returns an ArchiveMember for a standalone compressed tool output file (i.e. results_trivy.json.gz).
+    """
+
+    return ArchiveMember(location, None, os.path.getsize(location))
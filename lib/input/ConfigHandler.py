@@ -1,9 +1,9 @@
 import logging
 import os
-import sys
 import yaml
 
 from os import path
+from ..exceptions import ConfigError
 from ..output.Logger import Logger
 
 class ConfigHandler:
@@ -22,10 +22,21 @@ class ConfigHandler:
         self.jira_config = {}
         self.allowlisted_issues = []
         self.gitleaks = {}
+        self.correlation = {}
+        self.output = {}
         self.upload_to_aws = False
-
-        # Load the configuration file
-        self.load(filename)
+        self.aws_upload = {}
+        # A previous run's report to compare against (set from the command line)
+        self.baseline = ""
+        # Number of worker processes used to parse multi-target reports
+        self.workers = os.cpu_count() or 1
+
+        # Load the configuration file, or take the settings as given (i.e. by a program using lib.api)
+        if isinstance(filename, dict):
+            self.parse(filename)
+            self.l.spacer()
+        else:
+            self.load(filename)
 
 
     def parse(self, yaml_object):
@@ -37,8 +48,7 @@ class ConfigHandler:
             self.fail_threshold = yaml_object["fail_threshold"]
 
             if type(self.fail_threshold) is bool:
-                self.l.error("fail_threshold is a bool, did you use double quotes when defining fail_threshold in the .yml file?")
-                sys.exit(-1)
+                raise ConfigError("fail_threshold is a bool, did you use double quotes when defining fail_threshold in the .yml file?")
 
             if "fail_branches" in yaml_object:
                 self.fail_branches = yaml_object["fail_branches"]
@@ -55,6 +65,9 @@ class ConfigHandler:
         if "aws" in yaml_object:
             self.upload_to_aws = yaml_object["aws"]
 
+        if "aws_upload" in yaml_object:
+            self.aws_upload = yaml_object["aws_upload"]
+
         if "jira" in yaml_object:
             self.jira = yaml_object["jira"]
 
@@ -64,6 +77,16 @@ class ConfigHandler:
         if "gitleaks" in yaml_object:
             self.gitleaks = yaml_object["gitleaks"]
 
+        if "correlation" in yaml_object:
+            self.correlation = yaml_object["correlation"]
+
+        if "output" in yaml_object:
+            self.output = yaml_object["output"]
+
+        if "workers" in yaml_object:
+            self.workers = int(yaml_object["workers"])
+            self.l.info(f"Workers: {self.workers}")
+
 
     def load(self, filename):
         """
@@ -89,4 +112,4 @@ class ConfigHandler:
         else:
             self.l.warning(f"{filename} not found - skipping YAML parse stage")
 
-        print()
+        self.l.spacer()
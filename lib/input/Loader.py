@@ -1,8 +1,23 @@
 import os
-import sys
 
 from pathlib import Path
 
+from lib.exceptions import NoInputError
+from lib.input.Archive import COMPRESSED_PATTERNS, ArchiveMember, archive_type, load_archive, load_compressed
+
+# The tool output files that are loaded from the input directory (and its subdirectories)
+SUPPORTED_PATTERNS = ("**/results_*.json", "**/results_*.sarif")
+
+def input_size(loaded_file):
+    """
+    Returns the size of a loaded file, or of an archive member.
+    """
+
+    if isinstance(loaded_file, ArchiveMember):
+        return loaded_file.size
+    return os.path.getsize(loaded_file.name)
+
+
 def load_from_folder(logger, folder):
     l = logger
 
@@ -13,18 +28,66 @@ def load_from_folder(logger, folder):
     path = os.path.abspath(folder)
     l.info(f"Attempting to load files from {path}")
 
-    # Create a File object for each JSON file in the folder, storing them in loaded_files
-    for filename in Path(path).glob("**/results_*.json"):
-        tool_output = open(str(filename), "r", encoding="utf-8")
-        loaded_files.append(tool_output)
+    # The input can also be a single archive (i.e. a CircleCI workspace tarball or artifact). Archives are only read when
+    # they're the input, not when they're found in the input directory, as they may hold unrelated files
+    if os.path.isfile(path) and archive_type(path) is not None:
+        loaded_files.extend(load_archive(path))
+
+    # Create a File object for each JSON (or SARIF) file in the folder, storing them in loaded_files
+    for pattern in SUPPORTED_PATTERNS:
+        for filename in Path(path).glob(pattern):
+            tool_output = open(str(filename), "r", encoding="utf-8")
+            loaded_files.append(tool_output)
+
+    # Compressed files in the folder are read without being extracted
+    for pattern in COMPRESSED_PATTERNS:
+        for filename in Path(path).glob(pattern):
+            loaded_files.append(load_compressed(str(filename)))
 
     if len(loaded_files) > 0:
         l.info(f"Loaded {len(loaded_files)} supported file(s)")
         for filename in loaded_files:
             l.debug(f"> {os.path.basename(filename.name)}")
-        print()
+        l.spacer()
     else:
-        l.critical("No supported files were found - did you target the right directory?")
-        sys.exit(-1)
+        raise NoInputError("No supported files were found - did you target the right directory?")
 
     return loaded_files
+
+
+def select_shard(logger, loaded_files, index, total, folder):
+    """
+    Picks the files one of total shards should parse. Files are assigned largest first to whichever shard has the least
+    data so far, so every shard (given the same files) makes the same, size-balanced, choice. Unselected files are closed.
+
+    Files of the same size are ordered by their path relative to folder (the input directory), which is the same on every
+    shard wherever the input was checked out, and unique even if the same file name is used in several subdirectories.
+    """
+
+    l = logger
+
+    path = os.path.abspath(folder)
+    files = sorted(
+        loaded_files,
+        key=lambda loaded_file: (-input_size(loaded_file), os.path.relpath(os.path.abspath(loaded_file.name), path))
+    )
+
+    shard_sizes = [0] * total
+    selected_files = list()
+
+    for loaded_file in files:
+        shard = shard_sizes.index(min(shard_sizes))
+        shard_sizes[shard] += input_size(loaded_file)
+
+        if shard == index:
+            selected_files.append(loaded_file)
+        else:
+            loaded_file.close()
+
+    l.info(f"Shard {index + 1} of {total}: parsing {len(selected_files)} of {len(loaded_files)} file(s) ({shard_sizes[index]} bytes)")
+    for selected_file in selected_files:
+        l.debug(f"> {os.path.basename(selected_file.name)}")
+    l.spacer()
+
+    return selected_files
+
@@ -0,0 +1,93 @@
+import io
+import os
+import shutil
+import sys
+
+from lib.output.Sinks import compressors
+
+READ_SIZE = 1024 * 1024
+
+
+class TeeReader(io.RawIOBase):
+    """
+    Reads raw bytes from a pipe, copying them to an archive (i.e. a compressed file) as they pass through.
+    """
+
+    def __init__(self, source, name, archive = None):
+        self.source = source
+        self.name = name
+        self.archive = archive
+
+
+    def readable(self):
+        return True
+
+
+    def readinto(self, buffer):
+        data = self.source.read1(len(buffer)) if hasattr(self.source, "read1") else self.source.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+
+        if self.archive is not None and size:
+            self.archive.write(data)
+
+        return size
+
+
+    def close(self):
+        if self.closed:
+            return
+
+        try:
+            if self.archive is not None:
+                # Parsers can stop short of the end (i.e. trailing whitespace), but the archive should hold everything
+                shutil.copyfileobj(self.source, self.archive, READ_SIZE)
+                self.archive.close()
+        finally:
+            if self.source is not sys.stdin.buffer:
+                self.source.close()
+            super().close()
+
+
+class PipeInput(io.TextIOWrapper):
+    """
+    Tool output read from stdin or a named pipe rather than a file in the input directory.
+
+    Its name is the results_* file name the tool's output would otherwise have been saved as, so it reaches the same
+    parser. It can only be read once, so it isn't cached; if a compressed copy was kept (archive_location), that copy is
+    what gets uploaded.
+    """
+
+    def __init__(self, tee, archive_location = None):
+        super().__init__(io.BufferedReader(tee, READ_SIZE), encoding="utf-8")
+        self.archive_location = archive_location
+
+
+def open_pipe(logger, tool, source, output_path = "", compression = None):
+    """
+    Opens tool output from a pipe ("-" for stdin, or the location of a named pipe) for a parser to read as it's written.
+
+    If compression is set, the raw output is also written to a compressed file in output_path as it's read (i.e. for
+    uploading to S3), rather than being staged uncompressed first.
+    """
+
+    l = logger
+
+    name = f"results_{tool}.sarif" if tool == "sarif" else f"results_{tool}.json"
+
+    if source == "-":
+        l.info(f"Reading {tool} output from stdin")
+        stream = sys.stdin.buffer
+    else:
+        l.info(f"Reading {tool} output from {source}")
+        stream = open(source, "rb", buffering=0)
+
+    archive = None
+    archive_location = None
+    if compression is not None:
+        opener, suffix = compressors[compression]
+        archive_location = os.path.join(output_path, name + suffix)
+        archive = opener(archive_location, "wb")
+        l.debug(f"> Keeping a compressed copy at {archive_location}")
+
+    return PipeInput(TeeReader(stream, name, archive), archive_location)
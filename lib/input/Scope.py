@@ -0,0 +1,61 @@
+import os
+import subprocess
+
+from lib.constants import relative_path
+
+
+class Scope:
+    """
+    The set of files a pull request changed. Parsers of location-bearing findings (i.e. gosec, gitleaks) check each finding's
+    path against it before building an issue, so findings in untouched files are skipped and only counted.
+    """
+
+    def __init__(self, paths, working_directory = ""):
+        self.working_directory = working_directory
+        self.paths = set()
+        for path in paths:
+            path = relative_path(path.strip(), "")
+            if path != "":
+                self.paths.add(path)
+        self.skipped = 0
+
+
+    def contains(self, path):
+        """
+        Checks if a path reported by a tool is one of the changed files, counting it as skipped if not.
+        """
+
+        if relative_path(path, self.working_directory) in self.paths:
+            return True
+
+        self.skipped += 1
+        return False
+
+
+def from_file(location, working_directory = ""):
+    """
+    Creates a scope from a file listing a changed path per line.
+    """
+
+    with open(location, "r", encoding="utf-8") as changed_files:
+        return Scope(changed_files, working_directory)
+
+
+def from_git(base, working_directory = ""):
+    """
+    Creates a scope from the files changed between a base ref and HEAD in the local checkout (the working directory, if it
+    exists, or the current directory otherwise).
+    """
+
+    checkout = os.path.expanduser(working_directory)
+    if checkout == "" or not os.path.isdir(checkout):
+        checkout = "."
+
+    output = subprocess.run(
+        ["git", "-C", checkout, "diff", "--name-only", f"{base}...HEAD"],
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+
+    return Scope(output.splitlines(), working_directory)
@@ -0,0 +1,105 @@
+import json
+
+# ijson lets us pull individual targets/results out of a report without
+# holding the whole document in memory. If it isn't available we fall back to
+# json.load, which gives the same output at the cost of memory.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def __build(events, event, value):
+    """
+    Consumes ijson events until the container that started with (event, value) closes, returning the built object.
+    """
+
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+
+    if event not in ("start_map", "start_array"):
+        return builder.value
+
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                break
+
+    return builder.value
+
+
+def __walk(json_object, prefix, prefixes, boundary):
+    """
+    json.load fallback for iter_prefixed - walks an already loaded document using ijson's prefix naming.
+    """
+
+    if prefix in prefixes:
+        yield prefix, json_object
+        return
+
+    # Don't bother descending into containers that can't hold a prefix we want
+    if not any(wanted.startswith(prefix) for wanted in prefixes):
+        return
+
+    if isinstance(json_object, dict):
+        for key, value in json_object.items():
+            yield from __walk(value, f"{prefix}.{key}" if prefix else key, prefixes, boundary)
+    elif isinstance(json_object, list):
+        for value in json_object:
+            yield from __walk(value, f"{prefix}.item" if prefix else "item", prefixes, boundary)
+
+    if prefix == boundary:
+        yield boundary, None
+
+
+def iter_prefixed(json_file, prefixes, boundary = None):
+    """
+    Yields (prefix, object) tuples for every object in json_file found at one of the given ijson-style prefixes
+    (i.e. "item" for the elements of a top-level list, "runs.item.results.item" for each SARIF result), in document order.
+
+    If boundary is set (i.e. "runs.item"), (boundary, None) is also yielded each time a container at that prefix ends, so
+    objects can be grouped by the container they came from.
+    """
+
+    prefixes = tuple(prefixes)
+
+    if ijson is None:
+        yield from __walk(json.load(json_file), "", prefixes, boundary)
+        return
+
+    events = ijson.parse(json_file, use_float=True)
+    for prefix, event, value in events:
+        if prefix in prefixes and event not in ("end_map", "end_array", "map_key"):
+            yield prefix, __build(events, event, value)
+        elif prefix == boundary and event in ("end_map", "end_array"):
+            yield boundary, None
+
+
+def iter_targets(json_file):
+    """
+    Some tools (i.e. snyk with --all-projects) output a list of targets rather than a single object.
+    Yields each target in the file, regardless of which of the two forms was used.
+    """
+
+    if ijson is None:
+        json_object = json.load(json_file)
+        if isinstance(json_object, list):
+            yield from json_object
+        else:
+            yield json_object
+        return
+
+    events = ijson.parse(json_file, use_float=True)
+    for _, event, value in events:
+        if event == "start_array":
+            for prefix, event, value in events:
+                if prefix == "item" and event not in ("end_map", "end_array", "map_key"):
+                    yield __build(events, event, value)
+        else:
+            yield __build(events, event, value)
+        return
@@ -0,0 +1,255 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from pathlib import Path
+
+from lib.exceptions import NoInputError
+from lib.input.Archive import COMPRESSED_PATTERNS, load_compressed
+from lib.input.Loader import SUPPORTED_PATTERNS
+
+# Written to the input directory (i.e. by the last job of a workflow) once every scanner has finished
+DEFAULT_MARKER = "parser.done"
+DEFAULT_TIMEOUT = 30 * 60
+
+# When polling (or for files that were already there when watching began), a file is complete once its size hasn't
+# changed for this long
+SETTLE_SECONDS = 2
+POLL_SECONDS = 1
+
+# inotify event masks (see inotify(7)) - writes in progress (IN_MODIFY) are left to the settle check, so a large file
+# being written doesn't wake the watcher for every block
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# wd, mask, cookie and name length, followed by the (null padded) name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """
+    A minimal inotify binding (through ctypes, as the standard library has none), used to tell when a writer has closed a
+    file, and to wake the watcher as soon as anything in the input directory changes rather than on the next poll.
+    """
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Watch descriptors, mapped to the directory they watch
+        self.directories = {}
+
+
+    def add(self, directory):
+        if directory in self.directories.values():
+            return
+
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.directories[wd] = directory
+
+
+    def wait(self, timeout):
+        """
+        Waits for up to timeout seconds for something to change, returning the files that were closed after being written
+        to, or moved into a watched directory, in the meantime.
+        """
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        written = []
+        try:
+            while True:
+                data = os.read(self.fd, 64 * 1024)
+                if not data:
+                    break
+
+                # The kernel only returns whole events
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                    offset += INOTIFY_EVENT.size
+                    name = data[offset:offset + length].rstrip(b"\0")
+                    offset += length
+
+                    if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and name and wd in self.directories:
+                        written.append(os.path.join(self.directories[wd], os.fsdecode(name)))
+        except BlockingIOError:
+            pass
+
+        return written
+
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Watcher:
+    """
+    Yields the supported files (including compressed files) in a directory as each is
+    completely written, so they can be parsed while the remaining
+    scanners are still running. Iteration ends once the marker file appears (every remaining file is then taken as
+    complete), or the timeout expires (files still being written are then skipped).
+
+    A file is complete once a <file>.done sentinel is written next to it, or (with inotify) once its writer closes it.
+    Without inotify, and for files that were already there when watching began, it's complete once its size stops
+    changing. Empty files are never complete, as `scanner > results_scanner.json` creates the file before the scan has
+    written anything. A file that changes after being yielded is yielded again, but only once its size and mtime have
+    stopped changing (closes alone don't count, as a tool may rewrite its report, or write it over several opens).
+    """
+
+    def __init__(self, logger, folder, marker = DEFAULT_MARKER, timeout = DEFAULT_TIMEOUT):
+        self.l = logger
+        self.folder = os.path.abspath(folder)
+        self.marker = os.path.join(self.folder, marker)
+        self.timeout = timeout
+
+        # Every file yielded so far, in the order they were yielded (i.e. to be uploaded and closed afterwards)
+        self.loaded_files = list()
+
+        self.inotify = None
+        try:
+            self.inotify = Inotify()
+        except (AttributeError, OSError) as e:
+            self.l.debug(f"inotify is unavailable ({e}) - polling {self.folder} instead")
+
+
+    def __scan(self):
+        """
+        Returns the supported files and compressed files currently in the directory, watching any new
+        subdirectories.
+        """
+
+        if self.inotify is not None:
+            for directory, _, _ in os.walk(self.folder):
+                try:
+                    self.inotify.add(directory)
+                except OSError as e:
+                    self.l.debug(f"Could not watch {directory}: {e}")
+
+        patterns = SUPPORTED_PATTERNS + COMPRESSED_PATTERNS
+
+        found = set()
+        for pattern in patterns:
+            found.update(str(filename) for filename in Path(self.folder).glob(pattern) if filename.is_file())
+        return found
+
+
+    def __open(self, filename):
+        """
+        Returns the tool output in a completed file.
+        """
+
+        self.l.info(f"{os.path.relpath(filename, self.folder)} is complete")
+
+        if filename.endswith(".gz"):
+            tool_output = [load_compressed(filename)]
+        else:
+            tool_output = [open(filename, "r", encoding="utf-8")]
+
+        self.loaded_files.extend(tool_output)
+        return tool_output
+
+
+    def __iter__(self):
+        self.l.info(f"Watching {self.folder} for tool output (finishing when {os.path.basename(self.marker)} appears, or after {self.timeout}s)")
+        if self.inotify is None:
+            self.l.info("inotify is unavailable - polling for changes")
+        self.l.spacer()
+
+        deadline = time.monotonic() + self.timeout
+        # Files that have been yielded, mapped to their (size, mtime) when they were
+        done = {}
+        # Files still being written, mapped to their last seen (size, mtime) and when that last changed
+        pending = {}
+        # Files whose writer has closed them (or that were moved into place) since they were last yielded
+        closed = set()
+        # Files that changed after being yielded, which are only yielded again once they've settled
+        changed = set()
+        # The close of files that were already there can't have been seen, so they're left to the settle check
+        existing = self.__scan()
+
+        try:
+            while True:
+                finished = os.path.exists(self.marker)
+                now = time.monotonic()
+
+                for filename in sorted(self.__scan()):
+                    try:
+                        stat = os.stat(filename)
+                    except FileNotFoundError:
+                        continue
+
+                    state = (stat.st_size, stat.st_mtime_ns)
+                    if filename in done:
+                        # Closing a file without changing it doesn't make it new output
+                        if done[filename] == state:
+                            closed.discard(filename)
+                            continue
+                        self.l.warning(f"{os.path.relpath(filename, self.folder)} changed after it was parsed - parsing it again once it settles")
+                        del done[filename]
+                        changed.add(filename)
+
+                    if filename not in pending or pending[filename][0] != state:
+                        pending[filename] = (state, now)
+
+                    if stat.st_size == 0:
+                        continue
+
+                    settled = now - pending[filename][1] >= SETTLE_SECONDS
+
+                    # A changed file's sentinel (and any close) may be from before it changed, so it has to settle
+                    if filename in changed:
+                        written = settled
+                    elif self.inotify is None or filename in existing:
+                        written = settled or os.path.exists(filename + ".done")
+                    else:
+                        written = filename in closed or os.path.exists(filename + ".done")
+
+                    if finished or written:
+                        del pending[filename]
+                        closed.discard(filename)
+                        changed.discard(filename)
+                        done[filename] = state
+                        yield from self.__open(filename)
+
+                if finished:
+                    self.l.info(f"Found {os.path.basename(self.marker)} - finishing")
+                    for filename in sorted(pending):
+                        self.l.warning(f"Skipping {os.path.relpath(filename, self.folder)} as it is empty")
+                    break
+
+                if now >= deadline:
+                    self.l.warning(f"Timed out after {self.timeout}s waiting for {os.path.basename(self.marker)}")
+                    for filename in sorted(pending):
+                        self.l.warning(f"Skipping {os.path.relpath(filename, self.folder)} as it is still being written")
+                    break
+
+                # With inotify, only wake early for changes (or to re-check files that are still settling)
+                if self.inotify is not None:
+                    wait = POLL_SECONDS if pending else deadline - now
+                    closed.update(self.inotify.wait(min(wait, deadline - now)))
+                else:
+                    time.sleep(min(POLL_SECONDS, deadline - now))
+        finally:
+            if self.inotify is not None:
+                self.inotify.close()
+
+        self.l.spacer()
+
+        if len(self.loaded_files) == 0:
+            raise NoInputError("No supported files were written while watching - did you target the right directory?")
+
+        self.l.info(f"Loaded {len(self.loaded_files)} supported file(s) while watching")
+        self.l.spacer()
@@ -0,0 +1,63 @@
+import copy
+import re
+
+from lib.issues.Issue import Issue
+
+
+class Allowlist:
+    """
+    The allowlist from the config file, compiled so parsers can check findings against it before building them: ids are
+    held in a set and paths are combined into a single regular expression.
+
+    A finding is allowlisted if its uid is an allowed id, or an allowed path is a substring of its location (the same
+    rules as CoreParser.is_allowlisted).
+    """
+
+    def __init__(self, allowlisted_issues):
+        ids = allowlisted_issues.get("ids") if allowlisted_issues else None
+        paths = allowlisted_issues.get("paths") if allowlisted_issues else None
+
+        self.ids = set(ids or [])
+
+        self.pattern = None
+        if paths:
+            self.pattern = re.compile("|".join(re.escape(path) for path in paths))
+
+        # The number of findings skipped by parsers
+        self.skipped = 0
+
+
+    def share(self):
+        """
+        Returns an allowlist using the same compiled ids and paths, with its own count of skipped findings (i.e. so one
+        allowlist can be compiled once and used by many runs).
+        """
+
+        allowlist = copy.copy(self)
+        allowlist.skipped = 0
+        return allowlist
+
+
+    def is_empty(self):
+        return not self.ids and self.pattern is None
+
+
+    def matches_location(self, location):
+        return self.pattern is not None and self.pattern.search(location) is not None
+
+
+    def matches(self, tool_name, title, location, custom, uid = None):
+        """
+        Checks a finding's fields against the allowlist; paths are checked first as they don't need the uid to be hashed
+        (if it hasn't been already).
+        """
+
+        if self.matches_location(location):
+            return True
+
+        if self.ids:
+            if uid is None:
+                uid = Issue.fingerprint(tool_name, title, location, custom)
+            return uid in self.ids
+
+        return False
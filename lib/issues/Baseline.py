@@ -0,0 +1,255 @@
+import bisect
+import csv
+import gzip
+import heapq
+import json
+import lzma
+import mmap
+import os
+import sys
+import tempfile
+
+from lib.input.Streaming import iter_prefixed
+
+# Each uid (a sha256 hex digest) is stored in the index as its 32 raw bytes
+RECORD_SIZE = 32
+
+# Uids are sorted in runs of at most this many, which are then merged into the index, so only one run is held in memory
+RUN_RECORDS = 1024 * 1024
+
+# Compressed reports are opened with the matching module
+openers = {
+    ".gz": gzip.open,
+    ".xz": lzma.open
+}
+
+
+def open_report(location):
+    """
+    Opens a (possibly compressed) report as text, returning the file and its extension (i.e. ".csv").
+    """
+
+    name, extension = os.path.splitext(location)
+    if extension in openers:
+        return openers[extension](location, "rt", encoding="utf-8", newline=""), os.path.splitext(name)[1]
+
+    return open(location, "r", encoding="utf-8", newline=""), extension
+
+
+def read_uids(location):
+    """
+    Yields the uid of each issue in a previous run's CSV, JSON Lines or SARIF report.
+    """
+
+    report_file, extension = open_report(location)
+
+    with report_file:
+        if extension == ".csv":
+            # raw_output can be far larger than csv's default field size limit
+            csv.field_size_limit(sys.maxsize)
+            for row in csv.DictReader(report_file):
+                yield row["uid"]
+
+        elif extension == ".jsonl":
+            for line in report_file:
+                if line.strip():
+                    yield json.loads(line)["uid"]
+
+        elif extension == ".sarif":
+            for _, result in iter_prefixed(report_file, ("runs.item.results.item",)):
+                uid = result.get("partialFingerprints", {}).get("parserUid/v1")
+                if uid is not None:
+                    yield uid
+
+        else:
+            raise ValueError(f"Unsupported baseline format {extension} - use a .csv, .jsonl or .sarif report")
+
+
+def download(logger, metadata, location, directory):
+    """
+    Downloads a baseline stored in S3 (s3://bucket/key) into a (temporary) directory, returning its path.
+    """
+
+    import boto3
+
+    bucket, key = location[len("s3://"):].split("/", 1)
+    destination = os.path.join(directory, os.path.basename(key))
+
+    logger.info(f"Downloading baseline from {location}")
+    s3 = boto3.client(
+        "s3",
+        aws_access_key_id = metadata.aws_access_key_id or None,
+        aws_secret_access_key = metadata.aws_secret_key or None,
+        endpoint_url = metadata.aws_endpoint_url or None
+    )
+    s3.download_file(Bucket=bucket, Key=key, Filename=destination)
+
+    return destination
+
+
+def write_run(uids):
+    """
+    Writes a sorted, deduplicated run of uids to a temporary file.
+    """
+
+    run_file = tempfile.TemporaryFile()
+    for uid in sorted(set(uids)):
+        run_file.write(uid)
+    run_file.seek(0)
+    return run_file
+
+
+def iter_records(run_file):
+    while True:
+        record = run_file.read(RECORD_SIZE)
+        if not record:
+            return
+        yield record
+
+
+class UidIndex:
+    """
+    A read-only view over a sorted file of fixed-width uid records, searched in place.
+    """
+
+    def __init__(self, index_mmap, size):
+        self.index_mmap = index_mmap
+        self.size = size
+
+
+    def __len__(self):
+        return self.size
+
+
+    def __getitem__(self, position):
+        offset = position * RECORD_SIZE
+        return self.index_mmap[offset:offset + RECORD_SIZE]
+
+
+class Baseline:
+    """
+    Compares this run's issues against a previous run's report, classifying each issue as new or existing and keeping
+    track of the baseline issues that are no longer reported (fixed).
+
+    The baseline's uids are sorted externally (in runs, merged into one file) into an index that is memory-mapped and
+    binary searched, so large baselines aren't held in memory as Python objects.
+    """
+
+    def __init__(self, logger, metadata, location):
+        self.l = logger
+        self.m = metadata
+        self.location = location
+
+        # Downloaded baselines are only needed until they've been indexed
+        if location.startswith("s3://"):
+            with tempfile.TemporaryDirectory() as directory:
+                self.__build_index(download(self.l, self.m, location, directory))
+        else:
+            self.__build_index(location)
+
+        # One flag per baseline uid, set once the uid has been seen in this run
+        self.seen = bytearray(self.size)
+        self.new_count = 0
+        self.existing_count = 0
+
+        self.l.info(f"Loaded {self.size} baseline issue(s) from {self.location}")
+
+
+    def __build_index(self, location):
+        runs = []
+        uids = []
+        for uid in read_uids(location):
+            uids.append(bytes.fromhex(uid))
+            if len(uids) >= RUN_RECORDS:
+                runs.append(write_run(uids))
+                uids = []
+        if uids:
+            runs.append(write_run(uids))
+        del uids
+
+        # Merge the runs, dropping uids that appear in more than one
+        self.index_file = tempfile.TemporaryFile()
+        self.size = 0
+        previous = None
+        for record in heapq.merge(*(iter_records(run_file) for run_file in runs)):
+            if record != previous:
+                self.index_file.write(record)
+                self.size += 1
+                previous = record
+        self.index_file.flush()
+
+        for run_file in runs:
+            run_file.close()
+
+        # An empty file can't be mapped
+        if self.size > 0:
+            self.index_mmap = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.index_mmap = b""
+        self.index = UidIndex(self.index_mmap, self.size)
+
+
+    def find(self, uid):
+        """
+        Returns the position of a uid in the index, or -1 if it isn't in the baseline.
+        """
+
+        try:
+            record = bytes.fromhex(uid)
+        except ValueError:
+            return -1
+
+        position = bisect.bisect_left(self.index, record)
+        if position < self.size and self.index[position] == record:
+            return position
+        return -1
+
+
+    def classify(self, issue):
+        """
+        Marks an issue as new or existing. Any uids merged into the issue by correlation count as seen.
+        """
+
+        position = self.find(issue.hash)
+
+        for uid in issue.custom.get("correlated_uids", []):
+            correlated_position = self.find(uid)
+            if correlated_position >= 0:
+                self.seen[correlated_position] = 1
+                if position < 0:
+                    position = correlated_position
+
+        if position >= 0:
+            self.seen[position] = 1
+            issue.baseline = "existing"
+            self.existing_count += 1
+        else:
+            issue.baseline = "new"
+            self.new_count += 1
+
+
+    def fixed(self):
+        """
+        Returns the uids in the baseline that weren't reported in this run.
+        """
+
+        return [
+            self.index[position].hex()
+            for position in range(self.size) if not self.seen[position]
+        ]
+
+
+    def summary(self):
+        """
+        Returns the baseline comparison for the metadata payload.
+        """
+
+        fixed = self.fixed()
+
+        return {
+            "location": self.location,
+            "new": self.new_count,
+            "existing": self.existing_count,
+            "fixed_count": len(fixed),
+            "fixed": fixed
+        }
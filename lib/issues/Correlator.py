@@ -0,0 +1,271 @@
+from ..constants import calculate_rating, relative_path
+
+# Issue types that report a credential at a file and line, and can be correlated by location; code issues are also
+# correlated when their rule looks for hardcoded credentials (custom type "credential")
+LOCATION_ISSUE_TYPES = ["secrets"]
+
+# Findings this many lines apart (or closer) in the same file are treated as overlapping
+LINE_WINDOW = 2
+
+
+def package_key(package):
+    """
+    Normalises a dependency into a (name, version) key. The ecosystem is kept out of the key as not every tool reports it;
+    it is checked separately when grouping.
+    """
+
+    name = package["name"].strip().lower()
+    version = package["version"].strip().lower()
+    if version.startswith("v"):
+        version = version[1:]
+    return name, version
+
+
+def is_credential(issue):
+    return issue.issue_type in LOCATION_ISSUE_TYPES or issue.custom.get("type") == "credential"
+
+
+def find_root(parents, key):
+    """
+    Returns the root of a key's set in a union-find (parents maps each key to its parent), compressing the path to it.
+    """
+
+    root = key
+    while parents[root] != root:
+        root = parents[root]
+    while parents[key] != root:
+        parents[key], key = root, parents[key]
+    return root
+
+
+def purl(package):
+    """
+    Returns a PURL-like string (pkg:ecosystem/name@version) used when describing a package.
+    """
+
+    ecosystem = package["ecosystem"] if package["ecosystem"] != "" else "generic"
+    return f'pkg:{ecosystem}/{package["name"]}@{package["version"]}'
+
+
+class Correlator:
+    """
+    Merges issues that different tools reported for the same underlying problem into single issues.
+    """
+
+    def __init__(self, logger, issue_holder):
+        self.l = logger
+        self.issue_holder = issue_holder
+
+
+    def __merge(self, primary, duplicates, tools, heading, cves = None, rules = None):
+        """
+        Folds duplicates into primary, listing every contributing tool and CVE.
+        primary keeps its uid so existing allowlists and JIRA tickets continue to match it.
+        """
+
+        primary.raw_output = [{"tool_name": primary.tool_name, "raw_output": primary.raw_output}]
+        primary.custom["correlated_uids"] = []
+
+        for duplicate in duplicates:
+            primary.raw_output.append({"tool_name": duplicate.tool_name, "raw_output": duplicate.raw_output})
+            primary.custom["correlated_uids"].append(duplicate.hash)
+
+            if calculate_rating(duplicate.severity) > calculate_rating(primary.severity):
+                primary.severity = duplicate.severity
+
+            primary.fails = primary.fails or duplicate.fails
+
+        primary.tool_name = ", ".join(tools)
+        primary.custom["tools"] = tools
+
+        primary.description += f"\n\n{heading} was also reported by: {', '.join(tools[1:])}."
+        if cves:
+            primary.cve_value = ", ".join(cves)
+            primary.description += f"\nCVE(s): {primary.cve_value}"
+
+        if rules:
+            primary.custom["rules"] = rules
+            primary.description += f"\nRule(s): {', '.join(rules)}"
+
+
+    def dependencies(self):
+        """
+        Merges dependency issues that report the same package and version.
+
+        Every dependency issue's packages are indexed in a single pass. Issues reporting a single package are merged with
+        each other when more than one tool reported that package; issues covering many packages (i.e. a trivy container
+        issue) can't be folded into another issue, so they only contribute their tool name and CVEs to the merged issue.
+        """
+
+        self.l.info("Correlating dependency issues across tools")
+
+        index = {}
+
+        for issue in self.issue_holder.get_issues():
+            packages = issue.custom.get("packages", [])
+            for package in packages:
+                index.setdefault(package_key(package), []).append((issue, package, len(packages) == 1))
+
+        absorbed = set()
+        merged_issues = 0
+
+        for key, entries in index.items():
+
+            # Group entries by ecosystem; tools that don't report an ecosystem join the known one, as long as there's only
+            # one (otherwise which it belongs to is ambiguous)
+            groups = {}
+            for issue, package, single in entries:
+                groups.setdefault(package["ecosystem"], []).append((issue, package, single))
+
+            known = [ecosystem for ecosystem in groups if ecosystem != ""]
+            if "" in groups and len(known) == 1:
+                groups[known[0]].extend(groups.pop(""))
+
+            for group in groups.values():
+                singles = [issue for issue, _, single in group if single]
+
+                tools = []
+                cves = []
+                for issue, package, _ in group:
+                    if issue.tool_name not in tools:
+                        tools.append(issue.tool_name)
+                    for cve in package["cves"]:
+                        if cve not in cves:
+                            cves.append(cve)
+
+                if len(singles) == 0 or len(tools) < 2:
+                    continue
+
+                primary = singles[0]
+                tools.remove(primary.tool_name)
+                tools.insert(0, primary.tool_name)
+
+                self.__merge(primary, singles[1:], tools, purl(group[0][1]), cves = cves)
+                absorbed.update(id(duplicate) for duplicate in singles[1:])
+                merged_issues += 1
+
+        if absorbed:
+            self.issue_holder.findings_list = [
+                issue for issue in self.issue_holder.get_issues() if id(issue) not in absorbed
+            ]
+
+        self.l.info(f"Number of dependency issues merged: {merged_issues} ({len(absorbed)} duplicate(s) removed)")
+        self.l.spacer()
+
+
+    def __merge_cluster(self, path, cluster, start, end):
+        """
+        Merges a cluster of overlapping findings, as long as more than one tool reported them.
+        Returns the issues that were folded into another.
+        """
+
+        tools = []
+        rules = []
+        for issue in cluster:
+            if issue.tool_name not in tools:
+                tools.append(issue.tool_name)
+            for rule in issue.custom.get("rules", [issue.custom.get("rule", "")]):
+                if rule != "" and rule not in rules:
+                    rules.append(rule)
+
+        if len(tools) < 2:
+            return []
+
+        self.__merge(cluster[0], cluster[1:], tools, f"The code at {path} (lines {start}-{end})", rules = rules)
+        return cluster[1:]
+
+
+    def __spans(self, issue, working_directory):
+        """
+        Returns the (path, first line, last line) spans an issue reports. gitleaks issues merged per file ("multiple") have
+        a line range covering every offence in the file, so each range of offending lines is a span of its own instead.
+        """
+
+        path = relative_path(issue.custom["filepath"], working_directory)
+
+        if issue.custom.get("type") == "multiple":
+            return [(path, start, end) for start, end in issue.custom.get("line_ranges", []) if start > 0]
+
+        start, end = issue.custom["line_range"]
+        if start <= 0:
+            return []
+        return [(path, start, max(start, end))]
+
+
+    def locations(self, working_directory, window = LINE_WINDOW):
+        """
+        Merges credential issues (secrets, and code issues from credential rules) from different tools that point at the
+        same file and overlapping lines.
+
+        Spans are sorted by (path, first line) and swept once; a span joins the current cluster if it starts within window
+        lines of the cluster's end. An issue with many spans can end up in many clusters, which are then merged together.
+        """
+
+        self.l.info("Correlating secret and code issues across tools")
+
+        located = []
+        for issue in self.issue_holder.get_issues():
+            if not is_credential(issue):
+                continue
+            if "filepath" not in issue.custom or "line_range" not in issue.custom:
+                continue
+
+            located.extend(span + (issue,) for span in self.__spans(issue, working_directory))
+
+        located.sort(key=lambda entry: (entry[0], entry[1], entry[2]))
+
+        clusters = []
+        cluster = []
+        cluster_path, cluster_end = None, 0
+
+        for path, start, end, issue in located:
+            if cluster and path == cluster_path and start <= cluster_end + window:
+                cluster.append((start, end, issue))
+                cluster_end = max(cluster_end, end)
+                continue
+
+            if cluster:
+                clusters.append((cluster_path, cluster))
+
+            cluster = [(start, end, issue)]
+            cluster_path, cluster_end = path, end
+
+        if cluster:
+            clusters.append((cluster_path, cluster))
+
+        # Join clusters that share an issue (with a union-find over the issues), so each issue is only merged once
+        parents = {}
+
+        for _, cluster in clusters:
+            for _, _, issue in cluster:
+                parents.setdefault(id(issue), id(issue))
+            first = find_root(parents, id(cluster[0][2]))
+            for _, _, issue in cluster[1:]:
+                root = find_root(parents, id(issue))
+                if root != first:
+                    parents[root] = first
+
+        groups = {}
+        for path, cluster in clusters:
+            groups.setdefault(find_root(parents, id(cluster[0][2])), (path, []))[1].extend(cluster)
+
+        absorbed = []
+        merged_issues = 0
+
+        for path, spans in groups.values():
+            issues = list({id(issue): issue for _, _, issue in spans}.values())
+            start = min(start for start, _, _ in spans)
+            end = max(end for _, end, _ in spans)
+
+            duplicates = self.__merge_cluster(path, issues, start, end)
+            absorbed.extend(duplicates)
+            merged_issues += 1 if duplicates else 0
+
+        if absorbed:
+            absorbed = set(id(issue) for issue in absorbed)
+            self.issue_holder.findings_list = [
+                issue for issue in self.issue_holder.get_issues() if id(issue) not in absorbed
+            ]
+
+        self.l.info(f"Number of secret and code issues merged: {merged_issues} ({len(absorbed)} duplicate(s) removed)")
+        self.l.spacer()
@@ -22,11 +22,13 @@ class Issue:
             raw_output,
             severity,
             cve_value,
-            custom
+            custom,
+            uid = None
         ):
         """
         Instantiator of Issue objects.
-        Currently only used to set the instance variables.
+        Currently only used to set the instance variables. uid is the issue's fingerprint, if it's already known (i.e.
+        the parser computed it to check the allowlist, or it was saved in a snapshot).
         """
 
         self.issue_type = issue_type
@@ -42,31 +44,45 @@ class Issue:
 
         self.fails = False
 
+        # Set to "new" or "existing" when compared against a baseline
+        self.baseline = ""
+
         # Create a hash of the object as it is - we will use this for future comparisons
-        self.hash = f"{self.tool_name}:{self.title}:{self.location}"
+        self.hash = uid if uid is not None else Issue.fingerprint(tool_name, title, location, custom)
+
+
+    @staticmethod
+    def fingerprint(tool_name, title, location, custom):
+        """
+        Returns the uid an issue with these fields would have, so it can be checked (i.e. against the allowlist) without
+        building the issue.
+        """
+
+        fingerprint = f"{tool_name}:{title}:{location}"
 
         # Change the hash depending on the case to enforce consistency
         if tool_name == "gitleaks":
-            if self.custom["type"] == "single":
-                self.hash = f'{self.custom["filename"]}:{self.custom["line"]}'
+            if custom["type"] == "single":
+                fingerprint = f'{custom["filename"]}:{custom["line"]}'
             else:
-                self.hash = f'{self.custom["filepath"]}'
+                fingerprint = f'{custom["filepath"]}'
         elif tool_name == "insider":
-            if self.custom["type"] == "credential":
-                self.hash = f'{self.custom["filename"]}:{self.custom["line"]}'
+            if custom["type"] == "credential":
+                fingerprint = f'{custom["filename"]}:{custom["line"]}'
         elif tool_name == "gosec":
-            if self.custom["type"] == "credential":
-                self.hash = f'{self.custom["filename"]}:{self.custom["line"]}'
+            if custom["type"] == "credential":
+                fingerprint = f'{custom["filename"]}:{custom["line"]}'
 
-        self.hash = hashlib.sha256(self.hash.encode('utf-8')).hexdigest()
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
 
 
     def dictionary(self):
         """
-        Returns a dictionary containing an issue's fieldnames and their values.
+        Returns a dictionary containing an issue's fieldnames and their values. baseline is only included once the issue
+        has been compared against a baseline.
         """
 
-        return {
+        dictionary = {
             "issue_type": self.issue_type,
             "tool_name": self.tool_name,
             "title": self.title,
@@ -80,6 +96,11 @@ class Issue:
             "fails": self.fails
         }
 
+        if self.baseline:
+            dictionary["baseline"] = self.baseline
+
+        return dictionary
+
 
 fieldnames = [
     "issue_type",
@@ -96,9 +117,11 @@ fieldnames = [
 ]
 
 
-def get_fieldnames():
+def get_fieldnames(baseline = False):
     """
-    Returns the list of keys each issue has.
+    Returns the list of keys each issue has, including baseline if the issues were compared against a baseline.
     """
 
+    if baseline:
+        return fieldnames + ["baseline"]
     return fieldnames
\ No newline at end of file
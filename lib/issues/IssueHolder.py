@@ -1,6 +1,7 @@
 import hashlib
 import json
 
+from lib.issues import Snapshot
 from lib.issues.Issue import Issue
 
 class IssueHolder:
@@ -16,37 +17,41 @@ class IssueHolder:
         self.l = logger
         self.findings_list = list()
 
+        # The files changed by a pull request, if findings are limited to them
+        self.scope = None
 
-    def deduplicate(self):
-        """
-        Goes through the list and removes and duplicate issues.
-        In the process, it also creates a unique hash for each issue.
-        """
+        # The compiled allowlist, if findings are checked against it as they are parsed
+        self.allowlist = None
 
-        self.l.info("Deduplicating...")
 
-        # Create an empty list that will store calculated hashes.
-        issue_hash_oracle = []
+    def iter_deduplicated(self):
+        """
+        Goes through the list and yields each issue the first time its uid is seen, skipping any duplicates.
+        """
 
-        # Create an empty list that will contain the unique issues.
-        deduplicated_findings = []
+        # Create an empty set that will store seen hashes.
+        issue_hash_oracle = set()
 
-        # Iterate though a deep copy of the current issues we have
         for issue in self.get_issues():
 
-            # Get the contents of the issue in dictionary format
-            issue = issue.dictionary()
+            # uid = hash
+            if issue.hash not in issue_hash_oracle:
+                issue_hash_oracle.add(issue.hash)
+                yield issue
 
-            # issue_hash = self.create_hash(issue)
 
-            # uid = hash
-            if issue["uid"] not in issue_hash_oracle:
-                issue_hash_oracle.append(issue["uid"])
-                deduplicated_findings.append(issue)
+    def deduplicate(self):
+        """
+        Goes through the list and removes and duplicate issues.
+        In the process, it also creates a unique hash for each issue.
+        """
 
-        # The description and location of each issue is merged together and
+        self.l.info("Deduplicating...")
+
+        # The description and location of each issue is merged together and
         # hashed - if this hash has not been dealt with (this parsing round)
         # before then we'll accept it, otherwise ignore it.
+        deduplicated_findings = [issue.dictionary() for issue in self.iter_deduplicated()]
 
         self.l.debug(f"Array size: {self.size()}")
         self.l.info(f"Array size after deduplication: {len(deduplicated_findings)}")
@@ -72,12 +77,22 @@ class IssueHolder:
         raw_output = "n/a",
         severity = "low",
         cve_value = "n/a",
-        custom = {}
+        custom = {},
+        uid = None
     ):
         """
         Inserts a new issue to the list; the parameters force a reporting standard to be followed (i.e. each must have the first six parameters as "headings" in a report)
+
+        uid is the finding's fingerprint, passed by parsers that already computed it to check the allowlist themselves (so
+        it isn't checked, or computed, again).
         """
 
+        # Parsers that don't check the allowlist themselves are still caught before the issue is created
+        if uid is None:
+            uid = Issue.fingerprint(tool_name, title, location, custom)
+            if self.is_allowlisted(tool_name, title, location, custom, uid):
+                return
+
         self.findings_list.append(
             Issue(
                 issue_type,
@@ -89,11 +104,63 @@ class IssueHolder:
                 raw_output=raw_output,
                 severity=severity,
                 cve_value=cve_value,
-                custom=custom
+                custom=custom,
+                uid=uid
             )
         )
 
 
+    def in_scope(self, path):
+        """
+        Checks if a finding's path is in scope, so parsers can skip findings before building them.
+        """
+
+        return self.scope is None or self.scope.contains(path)
+
+
+    def is_allowlisted(self, tool_name, title, location, custom, uid = None):
+        """
+        Checks if a finding is allowlisted, so parsers can skip it before rendering its description. Skipped findings are
+        counted on the allowlist. Parsers pass the finding's uid (Issue.fingerprint) so it's only computed once.
+        """
+
+        if self.allowlist is None or not self.allowlist.matches(tool_name, title, location, custom, uid):
+            return False
+
+        self.allowlist.skipped += 1
+        return True
+
+
+    def extend(self, issues):
+        """
+        Inserts a list of already created issues (i.e. ones returned from a worker process) to the list.
+        """
+
+        self.findings_list.extend(issues)
+
+
+    def save_snapshot(self, location):
+        """
+        Saves the current list of issues to a snapshot file.
+        """
+
+        Snapshot.write(self.findings_list, location)
+        self.l.debug(f"Saved {self.size()} issue(s) to {location}")
+
+
+    def load_snapshot(self, location):
+        """
+        Adds the issues saved in a snapshot file to the list.
+        """
+
+        snapshot = Snapshot.Snapshot(location)
+        try:
+            self.findings_list.extend(snapshot)
+        finally:
+            snapshot.close()
+        self.l.debug(f"Loaded {len(snapshot)} issue(s) from {location}")
+
+
     def get_issues(self):
         """
         Returns the current list of issues.
@@ -3,11 +3,19 @@ import os
 from jira import JIRA
 from jira.exceptions import JIRAError
 
+# Connections are reused by every Jira object in the process (i.e. across projects in batch mode)
+clients = {}
+
 class Jira:
 
     def connect(self):
+        client_key = (self.m.jira_server, self.m.jira_username, self.m.jira_api_token)
+        if client_key in clients:
+            self.client = clients[client_key]
+            return True
+
         try:
-            self.client = JIRA(
+            self.client = clients[client_key] = JIRA(
                     self.m.jira_server,
                     basic_auth = (
                         self.m.jira_username,
@@ -21,8 +29,8 @@ class Jira:
                 self.l.error("We received a 401. Are your credentials correct?")
             else:
                 self.l.error("We're not sure what happened, so here's the stack:\n-----\n")
-                print(e.text)
-                print("-----")
+                self.l.error(e.text)
+                self.l.error("-----")
         return False
 
 
@@ -0,0 +1,234 @@
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+
+from lib.issues.Issue import Issue
+
+MAGIC = b"PSNP"
+VERSION = 1
+
+# magic, version, reserved, record count, string count, records offset, blobs offset, strings offset
+HEADER = struct.Struct("<4sHHIIQQQ")
+
+# uid (raw sha256), string indexes (issue_type, tool_name, title, severity, cve_value, recommendation, baseline), fails,
+# then blob offsets (description, location, raw_output, custom)
+RECORD = struct.Struct("<32s7IB3x4Q")
+
+# Offset (relative to the start of the string data) and length of each string in the string table
+STRING = struct.Struct("<QI")
+
+# Each blob is prefixed with its length
+BLOB_LENGTH = struct.Struct("<I")
+
+# Fields that tend to repeat across issues are stored once in the string table; the rest are stored as blobs
+STRING_FIELDS = ["issue_type", "tool_name", "title", "severity", "cve_value", "recommendation", "baseline"]
+BLOB_FIELDS = ["description", "location", "raw_output", "custom"]
+
+# Blobs that are stored as JSON rather than plain text
+JSON_FIELDS = ["raw_output", "custom"]
+
+
+class SnapshotWriter:
+    """
+    Writes issues to a snapshot file, a versioned binary format that can be loaded back without re-parsing:
+
+        header | fixed-width records | length-prefixed blobs | string table
+
+    Records and blobs are spooled to temporary files as issues are added, and only the (deduplicated) string table is
+    held in memory, so issues can be written as they're streamed.
+    """
+
+    def __init__(self, location):
+        self.location = location
+        self.records = tempfile.TemporaryFile()
+        self.blobs = tempfile.TemporaryFile()
+        self.blobs_size = 0
+        self.strings = {}
+        self.record_count = 0
+
+
+    def __string(self, value):
+        value = str(value)
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+
+    def __blob(self, value):
+        data = value.encode("utf-8")
+        offset = self.blobs_size
+        self.blobs.write(BLOB_LENGTH.pack(len(data)))
+        self.blobs.write(data)
+        self.blobs_size += BLOB_LENGTH.size + len(data)
+        return offset
+
+
+    def add(self, issue):
+        strings = [self.__string(getattr(issue, field)) for field in STRING_FIELDS]
+
+        blobs = []
+        for field in BLOB_FIELDS:
+            value = getattr(issue, field)
+            if field in JSON_FIELDS:
+                value = json.dumps(value, default=str)
+            blobs.append(self.__blob(value))
+
+        self.records.write(RECORD.pack(bytes.fromhex(issue.hash), *strings, int(issue.fails), *blobs))
+        self.record_count += 1
+
+
+    def close(self):
+        records_offset = HEADER.size
+        blobs_offset = records_offset + self.record_count * RECORD.size
+        strings_offset = blobs_offset + self.blobs_size
+
+        with open(self.location, "wb") as snapshot_file:
+            snapshot_file.write(
+                HEADER.pack(MAGIC, VERSION, 0, self.record_count, len(self.strings), records_offset, blobs_offset, strings_offset)
+            )
+
+            for spool in (self.records, self.blobs):
+                spool.seek(0)
+                shutil.copyfileobj(spool, snapshot_file)
+                spool.close()
+
+            # The string table's index comes first, so a string can be found without reading the ones before it
+            encoded_strings = [value.encode("utf-8") for value in self.strings]
+            string_offset = 0
+            for data in encoded_strings:
+                snapshot_file.write(STRING.pack(string_offset, len(data)))
+                string_offset += len(data)
+            for data in encoded_strings:
+                snapshot_file.write(data)
+
+
+def write(issues, location):
+    """
+    Writes a list of issues to a snapshot file.
+    """
+
+    writer = SnapshotWriter(location)
+    for issue in issues:
+        writer.add(issue)
+    writer.close()
+
+
+class Snapshot:
+    """
+    A memory-mapped snapshot file. Fields are only decoded when they're read, so i.e. listing uids doesn't decode any
+    descriptions or raw output.
+    """
+
+    def __init__(self, location):
+        self.location = location
+        self.snapshot_file = open(location, "rb")
+        self.snapshot_mmap = mmap.mmap(self.snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.snapshot_mmap) < HEADER.size:
+            raise ValueError(f"{location} is not a parser snapshot")
+
+        magic, version, _, self.record_count, self.string_count, self.records_offset, self.blobs_offset, self.strings_offset = \
+            HEADER.unpack_from(self.snapshot_mmap, 0)
+
+        if magic != MAGIC:
+            raise ValueError(f"{location} is not a parser snapshot")
+        if version != VERSION:
+            raise ValueError(f"{location} is a version {version} snapshot, but only version {VERSION} is supported")
+
+        self.string_data_offset = self.strings_offset + self.string_count * STRING.size
+        self.string_cache = {}
+
+
+    def __len__(self):
+        return self.record_count
+
+
+    def __record(self, position):
+        if not 0 <= position < self.record_count:
+            raise IndexError(position)
+        return RECORD.unpack_from(self.snapshot_mmap, self.records_offset + position * RECORD.size)
+
+
+    def __string(self, index):
+        value = self.string_cache.get(index)
+        if value is None:
+            offset, length = STRING.unpack_from(self.snapshot_mmap, self.strings_offset + index * STRING.size)
+            start = self.string_data_offset + offset
+            value = self.string_cache[index] = self.snapshot_mmap[start:start + length].decode("utf-8")
+        return value
+
+
+    def __blob(self, offset):
+        start = self.blobs_offset + offset
+        length, = BLOB_LENGTH.unpack_from(self.snapshot_mmap, start)
+        start += BLOB_LENGTH.size
+        return self.snapshot_mmap[start:start + length].decode("utf-8")
+
+
+    def uid(self, position):
+        return self.__record(position)[0].hex()
+
+
+    def field(self, position, name):
+        """
+        Returns a single field of an issue, decoding only that field.
+        """
+
+        record = self.__record(position)
+
+        if name == "uid":
+            return record[0].hex()
+        if name == "fails":
+            return bool(record[8])
+        if name in STRING_FIELDS:
+            return self.__string(record[1 + STRING_FIELDS.index(name)])
+        if name in BLOB_FIELDS:
+            value = self.__blob(record[9 + BLOB_FIELDS.index(name)])
+            return json.loads(value) if name in JSON_FIELDS else value
+
+        raise KeyError(name)
+
+
+    def issue(self, position):
+        """
+        Rebuilds the Issue stored at a position, keeping the uid it was saved with.
+        """
+
+        record = self.__record(position)
+        fields = {name: self.__string(record[1 + index]) for index, name in enumerate(STRING_FIELDS)}
+        for index, name in enumerate(BLOB_FIELDS):
+            value = self.__blob(record[9 + index])
+            fields[name] = json.loads(value) if name in JSON_FIELDS else value
+
+        issue = Issue(
+            fields["issue_type"],
+            fields["tool_name"],
+            fields["title"],
+            fields["description"],
+            fields["location"],
+            fields["recommendation"],
+            raw_output=fields["raw_output"],
+            severity=fields["severity"],
+            cve_value=fields["cve_value"],
+            custom=fields["custom"],
+            # Correlation can change the fields a uid was created from, so the saved uid is kept rather than recomputed
+            uid=record[0].hex()
+        )
+
+        issue.fails = bool(record[8])
+        issue.baseline = fields["baseline"]
+
+        return issue
+
+
+    def __iter__(self):
+        for position in range(self.record_count):
+            yield self.issue(position)
+
+
+    def close(self):
+        self.snapshot_mmap.close()
+        self.snapshot_file.close()
@@ -0,0 +1,157 @@
+import io
+import json
+import os
+import tarfile
+import time
+import zipfile
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# S3 rejects parts (other than the last) smaller than 5MB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+INDEX_NAME = "index.json"
+
+# Supported bundle formats, mapped to the suffix added to the bundle's name
+bundle_formats = {
+    "tar.gz": ".tar.gz",
+    "tar.xz": ".tar.xz",
+    "zip": ".zip"
+}
+
+
+class MultipartWriter(io.RawIOBase):
+    """
+    A write-only file object that streams whatever is written to it into an S3 multipart upload, so a file can be
+    uploaded as it is created without being written to disk first.
+
+    Parts are uploaded in the background, with at most max_concurrency in flight at once. The upload is completed when
+    the writer is closed, or aborted by abort().
+    """
+
+    def __init__(self, client, bucket, key, part_size, max_concurrency):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.max_concurrency = max_concurrency
+
+        self.buffer = bytearray()
+        self.parts = deque()
+        self.completed_parts = []
+        self.size = 0
+
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.upload_id = self.client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+
+
+    def writable(self):
+        return True
+
+
+    def write(self, data):
+        self.buffer += data
+        self.size += len(data)
+
+        while len(self.buffer) >= self.part_size:
+            self.__upload_part(bytes(self.buffer[:self.part_size]))
+            del self.buffer[:self.part_size]
+
+        return len(data)
+
+
+    def __upload_part(self, body):
+        part_number = len(self.completed_parts) + len(self.parts) + 1
+        self.parts.append(
+            self.executor.submit(
+                self.client.upload_part,
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+        )
+
+        # Bound the number of parts (and so the memory) in flight
+        while len(self.parts) >= self.max_concurrency:
+            self.__collect_part()
+
+
+    def __collect_part(self):
+        part_number = len(self.completed_parts) + 1
+        response = self.parts.popleft().result()
+        self.completed_parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+
+    def close(self):
+        if self.closed:
+            return
+
+        # The final part can be smaller than the part size (and a bundle always has at least one part)
+        if self.buffer or not self.completed_parts and not self.parts:
+            self.__upload_part(bytes(self.buffer))
+            self.buffer = bytearray()
+
+        while self.parts:
+            self.__collect_part()
+        self.executor.shutdown()
+
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.completed_parts}
+        )
+        super().close()
+
+
+    def abort(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        super().close()
+
+
+def write_bundle(file_object, bundle_format, index, members):
+    """
+    Writes a bundle of files to a (non-seekable) file object as a stream, with the index written as its first member.
+    members is a list of (local path, name in the bundle) pairs.
+    """
+
+    index_data = json.dumps(index).encode("utf-8")
+
+    if bundle_format == "zip":
+        with zipfile.ZipFile(file_object, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+            bundle.writestr(INDEX_NAME, index_data)
+            for full_path, name in members:
+                bundle.write(full_path, arcname=name)
+        return
+
+    compression = bundle_format.split(".")[1]
+    with tarfile.open(fileobj=file_object, mode=f"w|{compression}") as bundle:
+        index_info = tarfile.TarInfo(INDEX_NAME)
+        index_info.size = len(index_data)
+        index_info.mtime = int(time.time())
+        bundle.addfile(index_info, io.BytesIO(index_data))
+
+        for full_path, name in members:
+            bundle.add(full_path, arcname=name)
+
+
+def bundle_index(metadata, timestamp, members):
+    """
+    Creates the index written at the front of a bundle, listing the run and every file it contains.
+    """
+
+    return {
+        "timestamp": timestamp,
+        "repository": metadata.repository,
+        "branch": metadata.branch,
+        "commit_hash": metadata.commit_hash,
+        "job": metadata.job,
+        "files": [
+            {"name": name, "size": os.path.getsize(full_path)}
+            for full_path, name in members
+        ]
+    }
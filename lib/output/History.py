@@ -0,0 +1,207 @@
+import json
+import sqlite3
+
+from lib.output.Sinks import Sink
+
+# The number of issues inserted per executemany call
+BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp INTEGER,
+    repository TEXT,
+    branch TEXT,
+    commit_hash TEXT,
+    job TEXT,
+    is_pr INTEGER,
+    fail_threshold TEXT,
+    issue_count INTEGER,
+    payload TEXT
+);
+
+CREATE TABLE IF NOT EXISTS issues (
+    run_id INTEGER REFERENCES runs(id),
+    timestamp INTEGER,
+    repository TEXT,
+    branch TEXT,
+    commit_hash TEXT,
+    uid TEXT,
+    issue_type TEXT,
+    tool_name TEXT,
+    title TEXT,
+    severity TEXT,
+    description TEXT,
+    cve_value TEXT,
+    location TEXT,
+    recommendation TEXT,
+    raw_output TEXT,
+    fails INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS runs_repository ON runs (repository, branch, timestamp);
+CREATE INDEX IF NOT EXISTS issues_uid ON issues (uid, timestamp);
+CREATE INDEX IF NOT EXISTS issues_repository ON issues (repository, branch, severity);
+CREATE INDEX IF NOT EXISTS issues_commit ON issues (commit_hash);
+CREATE INDEX IF NOT EXISTS issues_severity ON issues (severity, repository);
+CREATE INDEX IF NOT EXISTS issues_run ON issues (run_id, severity);
+"""
+
+
+def connect(location):
+    """
+    Opens (creating if required) a run-history database.
+    """
+
+    connection = sqlite3.connect(location)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class HistorySink(Sink):
+    """
+    Appends the current run (its metadata payload and every issue) to a SQLite database, so the history of issues can be
+    queried across runs, repositories and branches.
+    """
+
+    # The database persists across runs, so it isn't uploaded alongside the report
+    upload = False
+
+    def __init__(self, location, metadata):
+        super().__init__(location)
+        self.m = metadata
+
+
+    def open(self):
+        self.connection = connect(self.location)
+        self.batch = []
+        self.issue_count = 0
+
+        self.run = (
+            self.m.payload.get("timestamp", 0),
+            self.m.repository,
+            self.m.branch,
+            self.m.commit_hash
+        )
+
+        cursor = self.connection.execute(
+            "INSERT INTO runs (timestamp, repository, branch, commit_hash, job, is_pr, fail_threshold) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*self.run, self.m.job, int(self.m.payload.get("is_pr", False)), self.m.payload.get("fail_threshold", ""))
+        )
+        self.run_id = cursor.lastrowid
+
+
+    def write(self, issue):
+        issue = issue.dictionary()
+        self.batch.append(
+            (
+                self.run_id,
+                *self.run,
+                issue["uid"],
+                issue["issue_type"],
+                issue["tool_name"],
+                issue["title"],
+                issue["severity"],
+                issue["description"],
+                issue["cve_value"],
+                issue["location"],
+                issue["recommendation"],
+                json.dumps(issue["raw_output"], default=str),
+                int(issue["fails"])
+            )
+        )
+        self.issue_count += 1
+
+        if len(self.batch) >= BATCH_SIZE:
+            self.flush()
+
+
+    def flush(self):
+        self.connection.executemany(
+            "INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self.batch
+        )
+        self.batch = []
+
+
+    def close(self):
+        self.flush()
+        self.connection.execute(
+            "UPDATE runs SET issue_count = ?, payload = ? WHERE id = ?",
+            (self.issue_count, json.dumps({**self.m.payload, "issue_count": self.issue_count}), self.run_id)
+        )
+        self.connection.commit()
+        self.connection.close()
+
+
+def first_seen(connection, uid):
+    """
+    Returns the earliest run (timestamp, repository, branch, commit) an issue was reported in.
+    """
+
+    return connection.execute(
+        "SELECT timestamp, repository, branch, commit_hash FROM issues WHERE uid = ? ORDER BY timestamp ASC LIMIT 1",
+        (uid,)
+    ).fetchone()
+
+
+def last_seen(connection, uid):
+    """
+    Returns the latest run (timestamp, repository, branch, commit) an issue was reported in.
+    """
+
+    return connection.execute(
+        "SELECT timestamp, repository, branch, commit_hash FROM issues WHERE uid = ? ORDER BY timestamp DESC LIMIT 1",
+        (uid,)
+    ).fetchone()
+
+
+def trend(connection, repository, branch = None, severity = None):
+    """
+    Returns (timestamp, branch, commit, issue count) for each run of a repository, optionally limited to a branch and
+    counting only issues of a given severity.
+    """
+
+    query = "SELECT runs.timestamp, runs.branch, runs.commit_hash, COUNT(issues.uid) FROM runs "
+    query += "LEFT JOIN issues ON issues.run_id = runs.id"
+    parameters = []
+
+    if severity is not None:
+        query += " AND issues.severity = ?"
+        parameters.append(severity)
+
+    query += " WHERE runs.repository = ?"
+    parameters.append(repository)
+
+    if branch is not None:
+        query += " AND runs.branch = ?"
+        parameters.append(branch)
+
+    query += " GROUP BY runs.id ORDER BY runs.timestamp ASC"
+
+    return connection.execute(query, parameters).fetchall()
+
+
+def branches(connection, repository, severity = None):
+    """
+    Returns (branch, commit, timestamp, issue count) for the latest run of each branch of a repository, optionally
+    counting only issues of a given severity.
+    """
+
+    query = "SELECT runs.branch, runs.commit_hash, runs.timestamp, COUNT(issues.uid) FROM runs "
+    query += "LEFT JOIN issues ON issues.run_id = runs.id"
+    parameters = []
+
+    if severity is not None:
+        query += " AND issues.severity = ?"
+        parameters.append(severity)
+
+    query += " WHERE runs.repository = ? AND runs.id IN "
+    query += "(SELECT MAX(id) FROM runs WHERE repository = ? GROUP BY branch)"
+    parameters += [repository, repository]
+
+    query += " GROUP BY runs.id ORDER BY runs.branch ASC"
+
+    return connection.execute(query, parameters).fetchall()
@@ -0,0 +1,117 @@
+import re
+import tempfile
+
+from xml.sax.saxutils import escape, quoteattr
+
+from lib.constants import relative_path
+from lib.output.Sinks import Sink, open_output
+
+# Failure messages and bodies are truncated to keep the file small
+MAX_MESSAGE_LENGTH = 200
+MAX_BODY_LENGTH = 2000
+
+# The maximum number of passing testcases written across the whole file (output.junit_max_testcases in the config
+# file); failing testcases are always written
+MAX_TESTCASES = 1000
+
+# Characters XML 1.0 doesn't allow, even escaped (i.e. terminal colour codes in tool output)
+ILLEGAL_XML_CHARACTERS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def truncate(text, length):
+    if len(text) > length:
+        return text[:length - 3] + "..."
+    return text
+
+
+def clean(text):
+    return ILLEGAL_XML_CHARACTERS.sub("", text)
+
+
+class JUnitSink(Sink):
+    """
+    Writes issues as a JUnit XML file (i.e. for CircleCI's store_test_results), with a testsuite per tool and a testcase
+    per issue. Issues that met the fail threshold are reported as failures, and are always written; passing issues beyond
+    the cap are only counted.
+
+    Testcases are spooled to a temporary file per tool, as each testsuite's counts have to be written before its testcases.
+    """
+
+    extension = ".junit.xml"
+
+    def open(self):
+        self.suites = {}
+        self.max_testcases = self.options.get("junit_max_testcases", MAX_TESTCASES)
+        self.testcase_count = 0
+
+
+    def __suite(self, tool_name):
+        if tool_name not in self.suites:
+            self.suites[tool_name] = {
+                "spool": tempfile.TemporaryFile("w+", encoding="utf-8"),
+                "tests": 0,
+                "failures": 0,
+                "omitted": 0
+            }
+        return self.suites[tool_name]
+
+
+    def write(self, issue):
+        suite = self.__suite(issue.tool_name)
+
+        if not issue.fails and self.testcase_count >= self.max_testcases:
+            suite["omitted"] += 1
+            return
+
+        self.testcase_count += 1
+        suite["tests"] += 1
+
+        classname = f"{issue.tool_name}.{issue.issue_type}"
+        name = f"{issue.title} ({issue.hash[:12]})"
+
+        testcase = f"<testcase classname={quoteattr(clean(classname))} name={quoteattr(clean(name))}"
+        filepath = relative_path(issue.custom.get("filepath", ""), "")
+        if filepath != "":
+            testcase += f" file={quoteattr(clean(filepath))}"
+
+        if issue.fails:
+            suite["failures"] += 1
+            message = truncate(f"{issue.severity}: {issue.description.splitlines()[0] if issue.description else issue.title}", MAX_MESSAGE_LENGTH)
+            body = truncate(f"{issue.description}\n\nLocation: {issue.location}\nIssue ID: {issue.hash}", MAX_BODY_LENGTH)
+            testcase += f"><failure message={quoteattr(clean(message))} type={quoteattr(clean(issue.severity))}>{escape(clean(body))}</failure></testcase>"
+        else:
+            testcase += "/>"
+
+        suite["spool"].write(testcase + "\n")
+
+
+    def flush(self):
+        # Testcases are only written to the report once every issue has been seen
+        pass
+
+
+    def close(self):
+        tests = sum(suite["tests"] for suite in self.suites.values())
+        failures = sum(suite["failures"] for suite in self.suites.values())
+
+        with open_output(self.location, self.compression) as junit_file:
+            junit_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            junit_file.write(f'<testsuites name="security-parser" tests="{tests}" failures="{failures}">\n')
+
+            for tool_name, suite in self.suites.items():
+                junit_file.write(f'<testsuite name={quoteattr(clean(tool_name))} tests="{suite["tests"]}" failures="{suite["failures"]}">\n')
+
+                suite["spool"].seek(0)
+                while True:
+                    chunk = suite["spool"].read(1024 * 1024)
+                    if not chunk:
+                        break
+                    junit_file.write(chunk)
+                suite["spool"].close()
+
+                if suite["omitted"] > 0:
+                    junit_file.write(f"<system-out>{suite['omitted']} further passing issue(s) were omitted from this file; see the full report.</system-out>\n")
+
+                junit_file.write("</testsuite>\n")
+
+            junit_file.write("</testsuites>\n")
@@ -5,16 +5,19 @@ STREAM_FORMAT = "%(asctime)s %(levelname)s %(name)s - %(message)s"
 class Logger:
 
 
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, console=True):
 
-        logging.basicConfig(
-            level = logging.INFO,
-            format = STREAM_FORMAT,
-            datefmt = "%H:%M:%S"
-        )
+        # When embedded (console=False), logging is left for the host program to configure
+        if console:
+            logging.basicConfig(
+                level = logging.INFO,
+                format = STREAM_FORMAT,
+                datefmt = "%H:%M:%S"
+            )
 
         self.l = logging.getLogger(__name__)
         self.verbose = verbose
+        self.console = console
 
         if verbose:
             self.l.setLevel(logging.DEBUG)
@@ -37,4 +40,13 @@ class Logger:
 
 
     def debug(self, m):
-        self.l.debug(m)
\ No newline at end of file
+        self.l.debug(m)
+
+
+    def spacer(self):
+        """
+        Separates the stages of a run in the console output.
+        """
+
+        if self.console:
+            print()
\ No newline at end of file
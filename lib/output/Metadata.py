@@ -50,12 +50,17 @@ class Metadata:
         if "CIRCLE_WORKING_DIRECTORY" in os.environ:
             self.working_directory = os.getenv("CIRCLE_WORKING_DIRECTORY")
 
+        if "CIRCLE_NODE_INDEX" in os.environ and "CIRCLE_NODE_TOTAL" in os.environ:
+            self.node_index = int(os.getenv("CIRCLE_NODE_INDEX"))
+            self.node_total = int(os.getenv("CIRCLE_NODE_TOTAL"))
+            self.l.debug(f"node: {self.node_index + 1} of {self.node_total}")
+
         if "CIRCLE_JOB" in os.environ:
             self.job = os.getenv("CIRCLE_JOB").replace("/", "-").replace("_", "-")
             self.payload["circleci_info"] = {
                 "job": self.job
             }
-        print()
+        self.l.spacer()
 
 
     def __get_aws_credentials(self):
@@ -82,11 +87,15 @@ class Metadata:
         else:
             self.l.error("The PARSER_AWS_SK environment variable was not found!")
             self.c.upload_to_aws = aws_found = False
+        # Optional - i.e. to upload to a local S3-compatible server instead of AWS
+        if "PARSER_AWS_ENDPOINT_URL" in os.environ:
+            self.aws_endpoint_url = os.getenv("PARSER_AWS_ENDPOINT_URL")
+            self.l.debug(f"AWS endpoint URL: {self.aws_endpoint_url}")
         if aws_found:
             self.l.info("All required AWS environment variables were found")
         else:
             self.l.warning("Not all required AWS variables were found - skipping upload")
-        print()
+        self.l.spacer()
 
     
     def __get_jira_environment_variables(self):
@@ -112,7 +121,7 @@ class Metadata:
         else:
             self.l.warning("Not all required JIRA variables were found - disabling functionality")
             self.jira = False
-        print()
+        self.l.spacer()
 
     
     def __validate(self, jira_config):
@@ -146,6 +155,8 @@ class Metadata:
 
         self.fail_branches = self.c.fail_branches
 
+        self.workers = self.c.workers
+
         self.jira = self.payload["jira"] = self.c.jira
         if self.jira and self.__validate(self.c.jira_config):
             self.jira_config = self.c.jira_config
@@ -159,6 +170,11 @@ class Metadata:
         self.commit_hash = ""
         self.job = ""
         self.working_directory = ""
+        self.repository_url = ""
+        self.is_pr = False
+        # The container this job is running in, when using CircleCI's parallelism
+        self.node_index = 0
+        self.node_total = 1
 
         if "CIRCLECI" in os.environ:
             self.is_circleci = True
@@ -175,11 +191,34 @@ class Metadata:
         self.aws_bucket_name = ""
         self.aws_access_key_id = ""
         self.aws_secret_key = ""
+        self.aws_endpoint_url = ""
 
         if self.c.upload_to_aws:
             self.__get_aws_credentials()
 
+        self.baseline = self.c.baseline
+        if self.baseline.startswith("s3://") and not self.c.upload_to_aws:
+            # Baselines stored in S3 are downloaded with the upload credentials, if they were provided
+            self.aws_access_key_id = os.getenv("PARSER_AWS_AK_ID", "")
+            self.aws_secret_key = os.getenv("PARSER_AWS_SK", "")
+            self.aws_endpoint_url = os.getenv("PARSER_AWS_ENDPOINT_URL", "")
+
         if self.c.gitleaks:
             self.gitleaks = self.c.gitleaks
         else:
-            self.gitleaks = {}
\ No newline at end of file
+            self.gitleaks = {}
+
+        if self.c.aws_upload:
+            self.aws_upload = self.c.aws_upload
+        else:
+            self.aws_upload = {}
+
+        if self.c.output:
+            self.output = self.c.output
+        else:
+            self.output = {}
+
+        if self.c.correlation:
+            self.correlation = self.c.correlation
+        else:
+            self.correlation = {}
\ No newline at end of file
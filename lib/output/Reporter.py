@@ -1,5 +1,3 @@
-import boto3
-import csv
 import glob
 import hashlib
 import json
@@ -12,8 +10,40 @@ load_dotenv()
 
 from pathlib import Path
 
+from lib.input.Archive import ArchiveMember
+from lib.input.Pipe import PipeInput
 from lib.issues.Issue import Issue, get_fieldnames
 from lib.issues.IssueHolder import IssueHolder
+from lib.output.Bundle import bundle_formats
+from lib.output.History import HistorySink
+from lib.output.JUnit import JUnitSink
+from lib.output.Sarif import SarifSink
+from lib.output.Sinks import compressors, write_all, CsvSink, JsonlSink, SnapshotSink
+from lib.output.Uploader import Uploader
+
+# The number of issues written between each flush of the report(s) to disk
+BUFFER_SIZE = 500
+
+# Output formats that can be enabled in the config file, mapped to their sinks
+sink_types = {
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "junit": JUnitSink,
+    "sarif": SarifSink,
+    "snapshot": SnapshotSink
+}
+
+def tool_path(full_path):
+    """
+    Returns a file's name along with the name of its parent directory (i.e. input/results_gosec.json).
+    """
+
+    filename = full_path.split("/")[-1]
+    path = Path(full_path)
+    parent_directory = str(path.parent).split("/")[-1]
+
+    return str(parent_directory) + "/" + str(filename)
+
 
 class Reporter:
     """
@@ -21,12 +51,15 @@ class Reporter:
     S3 bucket, etc.)
     """
 
-    def upload(self, s3, full_path):
+    def s3_run_path(self):
+        """
+        Creates the path the files for this run are uploaded under (its repository, commit, timestamp and job).
+        """
 
         self.s3_path = f"{self.m.repository}/{self.m.commit_hash}"
         
-        # If we're dealing with a pull request, then add it to the sha1 commit.
-        # We'll split it and deal with it in the Lambda (as this may not
+        # If we're dealing with a pull request, then add it to the sha1 commit.
+        # We'll split it and deal with it in the Lambda (as this may not
         # even be a pull request).
         # if self.m.is_pr:
         #     self.s3_path += f"_{self.m.pr_number}"
@@ -36,62 +69,108 @@ class Reporter:
         if self.m.job:
             self.s3_path += f"/{self.m.job}"
 
-        filename = full_path.split("/")[-1]
-        path = Path(full_path)
-        parent_directory = str(path.parent).split("/")[-1]
+        return self.s3_path
 
-        tool_path = str(parent_directory) + "/" + str(filename)
-        s3_tool_path = self.s3_path + "/" + tool_path
 
-        self.l.debug(f"> {tool_path} -> s3://{self.m.aws_bucket_name}/{s3_tool_path}")
+    def s3_key(self, full_path):
+        """
+        Creates the key a file is uploaded to under this run.
+        """
 
-        s3.upload_file(
-            Key=s3_tool_path,
-            Filename=full_path,
-            Bucket=self.m.aws_bucket_name
-        )
+        return self.s3_run_path() + "/" + tool_path(full_path)
 
 
     def upload_to_s3(self):
         self.l.info(f"Uploading to S3 bucket {self.m.aws_bucket_name}")
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id = self.m.aws_access_key_id,
-            aws_secret_access_key = self.m.aws_secret_key
-        )
-        self.l.debug("boto3.client instantiated")
-
-        # Upload output produced by any tools
-        self.l.info("Uploading original tool output files")
+        uploader = Uploader(self.l, self.m)
+
+        # Upload output produced by any tools, the parsed output and the metadata
+        full_paths = [
+            input_file.name for input_file in self.m.input_files
+            if not isinstance(input_file, (PipeInput, ArchiveMember))
+        ]
+
+        # Archives and compressed files are uploaded as they are, once each
         for input_file in self.m.input_files:
-            full_path = input_file.name
-            self.upload(s3, full_path)
+            if isinstance(input_file, ArchiveMember) and input_file.source not in full_paths:
+                full_paths.append(input_file.source)
 
-        # Upload the parsed output
-        self.l.info("Uploading parsed output")
-        self.upload(s3, self.csv_location)
+        # Piped output is only uploaded if a compressed copy of it was kept
+        full_paths += [
+            input_file.archive_location for input_file in self.m.input_files
+            if isinstance(input_file, PipeInput) and input_file.archive_location is not None
+        ]
+        run_paths = self.report_locations + [self.metadata_filepath]
 
-        self.l.info("Uploading metadata")
-        self.upload(s3, self.metadata_filepath)
+        layout = self.m.aws_upload.get("layout", "run")
+
+        if layout == "bundle":
+            # Everything is packed into a single object
+            bundle_format = self.m.aws_upload.get("bundle_format", "tar.gz")
+            if bundle_format not in bundle_formats:
+                self.l.error(f"Unsupported bundle format {bundle_format} - using tar.gz")
+                bundle_format = "tar.gz"
+
+            bundle_key = f"{self.s3_run_path()}/parser_bundle_{self.timestamp}{bundle_formats[bundle_format]}"
+            members = [(full_path, tool_path(full_path)) for full_path in full_paths + run_paths]
+            uploader.upload_bundle(bundle_key, bundle_format, self.timestamp, members)
+
+            self.l.info("Upload complete")
+            return
+
+        if layout == "content":
+            # Tool output is stored by content, with a manifest under the run pointing at each file
+            blobs = uploader.upload_blobs(full_paths)
+            run_paths.append(self.generate_manifest_file(full_paths, blobs))
+        else:
+            run_paths = full_paths + run_paths
+
+        uploader.upload_all([(full_path, self.s3_key(full_path)) for full_path in run_paths])
 
         self.l.info("Upload complete")
 
 
-    def prepare_csv_name(self):
+    def prepare_report_name(self):
         """
-        Creates the name of the file to save issue output to.
+        Creates the name of the file(s) to save issue output to, without an extension.
         The name can also include other values (such as the git repository name and branch) taken from CircleCI build variables.
         """
 
-        csv_name = f"parser_output"
+        report_name = f"parser_output"
 
         if self.m.is_circleci:
-            csv_name += f"_circleci"
-            csv_name += f"_{self.m.repository}"
+            report_name += f"_circleci"
+            report_name += f"_{self.m.repository}"
 
-        csv_name += f"_{self.timestamp}.csv"
+        report_name += f"_{self.timestamp}"
         
-        return csv_name
+        return report_name
+
+
+    def prepare_sinks(self):
+        """
+        Creates a sink for each output format enabled in the config file (a CSV report by default).
+        """
+
+        formats = self.m.output.get("formats", ["csv"])
+        compression = self.m.output.get("compression", None)
+
+        if compression is not None and compression not in compressors:
+            self.l.error(f"Unsupported compression {compression} - the report will not be compressed")
+            compression = None
+
+        sinks = []
+        for output_format in formats:
+            if output_format not in sink_types:
+                self.l.error(f"Unsupported output format {output_format} - skipping")
+                continue
+            sinks.append(sink_types[output_format](self.report_location, compression, self.m.output, bool(self.m.baseline)))
+
+        # Append this run to a run-history database, if one was configured
+        if "history" in self.m.output:
+            sinks.append(HistorySink(self.m.output["history"], self.m))
+
+        return sinks
 
 
     def __init__(self, logger, metadata, issue_holder):
@@ -107,30 +186,43 @@ class Reporter:
         self.timestamp = int(time.time())
         self.m.payload["timestamp"] = self.timestamp
 
-        # Determine the exact path to save the parsed output to.
-        self.csv_name = self.prepare_csv_name()
-        self.csv_location = f"{self.m.output_path}/{self.csv_name}"
+        # Determine the exact path to save the parsed output to; each sink adds its own extension.
+        self.report_name = self.prepare_report_name()
+        self.report_location = f"{self.m.output_path}/{self.report_name}"
+
+        self.sinks = self.prepare_sinks()
+        self.report_locations = [sink.location for sink in self.sinks if sink.upload]
 
 
-    def create_csv_report(self):
+    def create_report(self):
         """
-        Obtains the current list of issues and prints them to a CSV file.
+        Obtains the current list of issues and writes them to each enabled output format.
         """
 
-        self.l.info(f"Generating CSV report at {self.csv_location}")
-        with open(self.csv_location, 'w+', newline="\n", encoding="utf-8") as csv_file_object:
-            writer = csv.DictWriter(csv_file_object, fieldnames=get_fieldnames())
-            writer.writeheader()
+        for sink in self.sinks:
+            self.l.info(f"Generating report at {sink.location}")
 
-            if self.issue_holder.size() > 0:
-                deduplicated_findings = self.issue_holder.deduplicate()
-                self.m.payload["issue_count"] = len(deduplicated_findings)
+        if self.issue_holder.size() > 0:
+            self.l.info("Deduplicating...")
+        self.m.payload["issue_count"] = write_all(self.sinks, self.issue_holder.iter_deduplicated(), BUFFER_SIZE)
+        self.l.info(f"Array size after deduplication: {self.m.payload['issue_count']}")
 
-                for finding in deduplicated_findings:
-                    writer.writerow(finding)
-            else:
-                self.m.payload["issue_count"] = 0
+        self.l.info("Report created\n")
+        return True
+
+
+    def stream_report(self, issues):
+        """
+        Writes finalised issues to each enabled output format as they are produced (i.e. by CoreParser.stream), rather
+        than waiting for every file to be parsed.
+        """
 
+        for sink in self.sinks:
+            self.l.info(f"Streaming report to {sink.location}")
+
+        self.m.payload["issue_count"] = write_all(self.sinks, issues, BUFFER_SIZE)
+
+        self.l.info(f"Issues reported: {self.m.payload['issue_count']}")
         self.l.info("Report created\n")
         return True
 
@@ -140,3 +232,28 @@ class Reporter:
 
         with open(self.metadata_filepath, "w") as metadata_file:
             json.dump(self.m.payload, metadata_file)
+
+
+    def generate_manifest_file(self, full_paths, blobs):
+        """
+        Writes the manifest for a content-addressed upload, mapping each tool output file to the blob it is stored in.
+        """
+
+        manifest_filename = f"parser_manifest_{self.timestamp}.json"
+        manifest_filepath = f"{self.m.output_path}/{manifest_filename}"
+
+        manifest = {
+            "timestamp": self.timestamp,
+            "repository": self.m.repository,
+            "commit_hash": self.m.commit_hash,
+            "job": self.m.job,
+            "files": [
+                {"name": tool_path(full_path), **blob}
+                for full_path, blob in zip(full_paths, blobs)
+            ]
+        }
+
+        with open(manifest_filepath, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        return manifest_filepath
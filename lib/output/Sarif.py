@@ -0,0 +1,168 @@
+import hashlib
+import json
+import tempfile
+
+from lib.constants import relative_path
+from lib.output.Sinks import Sink, open_output
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+
+# Our severities mapped onto SARIF levels, and onto the security-severity scores used by code scanning dashboards
+levels = {
+    "critical": "error",
+    "high": "error",
+    "medium": "warning",
+    "low": "note",
+    "informational": "note"
+}
+
+security_severities = {
+    "critical": "9.5",
+    "high": "8.0",
+    "medium": "5.5",
+    "low": "2.0",
+    "informational": "0.0"
+}
+
+
+def rule_id(title):
+    """
+    Creates a stable rule id from an issue's title, so the same finding keeps its rule across runs.
+    """
+
+    return hashlib.sha256(title.encode("utf-8")).hexdigest()[:16]
+
+
+class SarifSink(Sink):
+    """
+    Writes issues to a SARIF 2.1.0 file with a run per tool.
+
+    Results are spooled to a temporary file per tool as they arrive and copied into their run when the sink is closed,
+    so only the rules table for each tool is held in memory.
+    """
+
+    extension = ".sarif"
+
+    def open(self):
+        self.tools = {}
+
+
+    def __tool(self, tool_name):
+        """
+        Returns the rules table and spool file for a tool, creating them the first time the tool is seen.
+        """
+
+        if tool_name not in self.tools:
+            self.tools[tool_name] = {
+                "rules": [],
+                "rule_indexes": {},
+                "spool": tempfile.TemporaryFile("w+", encoding="utf-8"),
+                "result_count": 0
+            }
+        return self.tools[tool_name]
+
+
+    def __rule_index(self, tool, issue):
+        """
+        Returns the index of an issue's rule in its tool's rules table, adding the rule the first time its title is seen.
+        """
+
+        if issue.title not in tool["rule_indexes"]:
+            tool["rule_indexes"][issue.title] = len(tool["rules"])
+            tool["rules"].append(
+                {
+                    "id": rule_id(issue.title),
+                    "name": issue.title,
+                    "shortDescription": {"text": issue.title},
+                    "help": {"text": issue.recommendation},
+                    "properties": {
+                        "security-severity": security_severities.get(issue.severity, "0.0"),
+                        "tags": ["security", issue.issue_type]
+                    }
+                }
+            )
+        return tool["rule_indexes"][issue.title]
+
+
+    def __location(self, issue):
+        """
+        Maps an issue onto a SARIF location. Issues that report a file (and line) become physical locations; anything else
+        (i.e. a container image or dependency) is reported as a logical location.
+        """
+
+        filepath = relative_path(issue.custom.get("filepath", ""), "")
+        if filepath != "":
+            physical_location = {
+                "artifactLocation": {"uri": filepath}
+            }
+
+            start, end = issue.custom.get("line_range", [0, 0])
+            if start > 0:
+                physical_location["region"] = {
+                    "startLine": start,
+                    "endLine": max(start, end)
+                }
+
+            return {"physicalLocation": physical_location}
+
+        return {"logicalLocations": [{"name": issue.location}]}
+
+
+    def write(self, issue):
+        tool = self.__tool(issue.tool_name)
+        index = self.__rule_index(tool, issue)
+
+        result = {
+            "ruleId": tool["rules"][index]["id"],
+            "ruleIndex": index,
+            "level": levels.get(issue.severity, "warning"),
+            "message": {"text": issue.description},
+            "locations": [self.__location(issue)],
+            "partialFingerprints": {"parserUid/v1": issue.hash},
+            "properties": {
+                "issue_type": issue.issue_type,
+                "severity": issue.severity,
+                "cve_value": issue.cve_value,
+                "location": issue.location,
+                "fails": issue.fails
+            }
+        }
+
+        if tool["result_count"] > 0:
+            tool["spool"].write(",")
+        tool["spool"].write(json.dumps(result, default=str))
+        tool["result_count"] += 1
+
+
+    def flush(self):
+        # Results are only written to the report once every issue has been seen
+        pass
+
+
+    def close(self):
+        with open_output(self.location, self.compression) as sarif_file:
+            sarif_file.write(f'{{"$schema": "{SARIF_SCHEMA}", "version": "{SARIF_VERSION}", "runs": [')
+
+            for count, (tool_name, tool) in enumerate(self.tools.items()):
+                if count > 0:
+                    sarif_file.write(",")
+
+                driver = {
+                    "name": tool_name,
+                    "rules": tool["rules"]
+                }
+                sarif_file.write(f'{{"tool": {{"driver": {json.dumps(driver)}}}, "results": [')
+
+                # Copy the spooled results across in chunks
+                tool["spool"].seek(0)
+                while True:
+                    chunk = tool["spool"].read(1024 * 1024)
+                    if not chunk:
+                        break
+                    sarif_file.write(chunk)
+                tool["spool"].close()
+
+                sarif_file.write("]}")
+
+            sarif_file.write("]}")
@@ -0,0 +1,152 @@
+import csv
+import gzip
+import json
+import lzma
+
+from lib.issues.Issue import get_fieldnames
+from lib.issues.Snapshot import SnapshotWriter
+
+# Supported compression methods, mapped to the function used to open the file and the suffix added to its name
+compressors = {
+    "gzip": (gzip.open, ".gz"),
+    "xz": (lzma.open, ".xz")
+}
+
+
+def open_output(location, compression = None):
+    """
+    Opens a file for writing text to, compressing its contents if required.
+    """
+
+    if compression is None:
+        return open(location, "w", newline="", encoding="utf-8")
+
+    opener, _ = compressors[compression]
+    return opener(location, "wt", newline="", encoding="utf-8")
+
+
+class Sink:
+    """
+    A destination that issues are written to as they are reported.
+    Each sink writes a single file, named after the report with the sink's extension (and compression suffix) added.
+    """
+
+    extension = ""
+
+    # Whether the file is uploaded to S3 alongside the report
+    upload = True
+
+    def __init__(self, location, compression = None, options = None, baseline = False):
+        self.compression = compression
+        # The output section of the config file, for sinks that take their own settings
+        self.options = options if options is not None else {}
+        # Whether the issues are compared against a baseline (and so have a baseline field)
+        self.baseline = baseline
+        self.location = location + self.extension
+        if compression is not None:
+            self.location += compressors[compression][1]
+        self.file_object = None
+
+
+    def open(self):
+        self.file_object = open_output(self.location, self.compression)
+
+
+    def write(self, issue):
+        """
+        Writes a single Issue.
+        """
+
+        raise NotImplementedError
+
+
+    def flush(self):
+        self.file_object.flush()
+
+
+    def close(self):
+        self.file_object.close()
+
+
+class CsvSink(Sink):
+    """
+    Writes issues to a CSV file, with a column per issue field.
+    """
+
+    extension = ".csv"
+
+    def open(self):
+        super().open()
+        self.writer = csv.DictWriter(self.file_object, fieldnames=get_fieldnames(self.baseline))
+        self.writer.writeheader()
+
+
+    def write(self, issue):
+        self.writer.writerow(issue.dictionary())
+
+
+class JsonlSink(Sink):
+    """
+    Writes issues to a JSON Lines file (one JSON object per issue per line), keeping raw_output as JSON rather than a
+    Python repr so it can be loaded back in by consumers.
+    """
+
+    extension = ".jsonl"
+
+    def write(self, issue):
+        self.file_object.write(json.dumps(issue.dictionary(), default=str) + "\n")
+
+
+class SnapshotSink(Sink):
+    """
+    Writes issues to a binary snapshot (see lib/issues/Snapshot.py) that can be loaded back into an IssueHolder, keeping
+    every field's type. Snapshots aren't compressed, so they can be memory-mapped when loaded.
+    """
+
+    extension = ".snapshot"
+
+    def __init__(self, location, compression = None, options = None, baseline = False):
+        super().__init__(location, None, options, baseline)
+
+
+    def open(self):
+        self.writer = SnapshotWriter(self.location)
+
+
+    def write(self, issue):
+        self.writer.add(issue)
+
+
+    def flush(self):
+        pass
+
+
+    def close(self):
+        self.writer.close()
+
+
+def write_all(sinks, findings, flush_every):
+    """
+    Writes each issue to every sink in a single pass over the issues, flushing the sinks every flush_every issues.
+    Returns the number of issues written.
+    """
+
+    issue_count = 0
+
+    for sink in sinks:
+        sink.open()
+
+    try:
+        for finding in findings:
+            for sink in sinks:
+                sink.write(finding)
+
+            issue_count += 1
+            if issue_count % flush_every == 0:
+                for sink in sinks:
+                    sink.flush()
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    return issue_count
@@ -0,0 +1,196 @@
+import boto3
+
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from lib.constants import file_digest
+from lib.output.Bundle import bundle_index, write_bundle, MultipartWriter
+
+MB = 1024 * 1024
+
+# Defaults for the aws_upload section of the config file
+WORKERS = 8
+MAX_CONCURRENCY = 4
+MULTIPART_THRESHOLD = 8 * MB
+MULTIPART_CHUNKSIZE = 16 * MB
+MAX_ATTEMPTS = 5
+BLOB_PREFIX = "blobs"
+
+# Clients are shared by every Uploader in the process (i.e. across projects in batch mode) with the same settings
+clients = {}
+
+
+class Uploader:
+    """
+    Uploads files to the S3 bucket through a bounded pool of threads sharing a single client.
+
+    Files over the multipart threshold are split into parts that are uploaded concurrently, and failed requests (whole
+    files or individual parts) are retried by botocore before the upload is given up on.
+    """
+
+    def __init__(self, logger, metadata):
+        self.l = logger
+        self.m = metadata
+
+        options = self.m.aws_upload
+        self.workers = int(options.get("workers", WORKERS))
+        max_concurrency = int(options.get("max_concurrency", MAX_CONCURRENCY))
+
+        self.transfer_config = TransferConfig(
+            multipart_threshold=int(options.get("multipart_threshold", MULTIPART_THRESHOLD)),
+            multipart_chunksize=int(options.get("multipart_chunksize", MULTIPART_CHUNKSIZE)),
+            max_concurrency=max_concurrency,
+            use_threads=True
+        )
+
+        # Every worker may have max_concurrency parts in flight, all of which share the client's connection pool
+        client_config = Config(
+            retries={
+                "max_attempts": int(options.get("max_attempts", MAX_ATTEMPTS)),
+                "mode": "standard"
+            },
+            max_pool_connections=self.workers * max_concurrency
+        )
+
+        self.multipart_chunksize = self.transfer_config.multipart_chunksize
+        self.max_concurrency = max_concurrency
+
+        client_key = (
+            self.m.aws_access_key_id,
+            self.m.aws_secret_key,
+            self.m.aws_endpoint_url,
+            client_config.retries["max_attempts"],
+            client_config.max_pool_connections
+        )
+
+        if client_key not in clients:
+            clients[client_key] = boto3.client(
+                "s3",
+                aws_access_key_id = self.m.aws_access_key_id,
+                aws_secret_access_key = self.m.aws_secret_key,
+                endpoint_url = self.m.aws_endpoint_url or None,
+                config = client_config
+            )
+            self.l.debug("boto3.client instantiated")
+        self.client = clients[client_key]
+
+
+    def upload_file(self, full_path, key):
+        self.l.debug(f"> {full_path} -> s3://{self.m.aws_bucket_name}/{key}")
+
+        self.client.upload_file(
+            Filename=full_path,
+            Bucket=self.m.aws_bucket_name,
+            Key=key,
+            Config=self.transfer_config
+        )
+
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.m.aws_bucket_name, Key=key)
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+
+    def upload_blob(self, full_path):
+        """
+        Uploads a file under the sha256 digest of its contents, unless an object with that digest already exists.
+        Returns the blob's manifest entry.
+        """
+
+        digest = file_digest(full_path)
+        key = f"{self.m.aws_upload.get('blob_prefix', BLOB_PREFIX)}/{digest}"
+
+        uploaded = not self.exists(key)
+        if uploaded:
+            self.upload_file(full_path, key)
+        else:
+            self.l.debug(f"> {full_path} is unchanged (s3://{self.m.aws_bucket_name}/{key})")
+
+        return {
+            "sha256": digest,
+            "key": key,
+            "uploaded": uploaded
+        }
+
+
+    def __run(self, function, tasks):
+        """
+        Calls function(*task) for every task concurrently, returning the results in the order of the tasks.
+        Every task is attempted; if any of them failed, the first error is raised once the rest have finished.
+        """
+
+        results = [None] * len(tasks)
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(function, *task): index
+                for index, task in enumerate(tasks)
+            }
+
+            for future in as_completed(futures):
+                index = futures[future]
+                error = future.exception()
+                if error is not None:
+                    self.l.error(f"Failed to upload {tasks[index][0]}: {error}")
+                    errors.append(error)
+                else:
+                    results[index] = future.result()
+
+        if errors:
+            raise errors[0]
+
+        return results
+
+
+    def upload_all(self, uploads):
+        """
+        Uploads a list of (local path, key) pairs concurrently.
+        """
+
+        self.__run(self.upload_file, uploads)
+        self.l.info(f"Uploaded {len(uploads)} file(s)")
+
+
+    def upload_blobs(self, full_paths):
+        """
+        Uploads a list of files by the digest of their contents concurrently, skipping any that are already stored.
+        Returns a manifest entry per file.
+        """
+
+        blobs = self.__run(self.upload_blob, [(full_path,) for full_path in full_paths])
+        uploaded = sum(1 for blob in blobs if blob["uploaded"])
+        self.l.info(f"Uploaded {uploaded} of {len(blobs)} file(s) by content ({len(blobs) - uploaded} unchanged)")
+
+        return blobs
+
+
+    def upload_bundle(self, key, bundle_format, timestamp, members):
+        """
+        Packs a list of (local path, name in the bundle) pairs into a single bundle, streamed straight into a multipart
+        upload as it is compressed. Returns the size of the bundle.
+        """
+
+        self.l.debug(f"> {len(members)} file(s) -> s3://{self.m.aws_bucket_name}/{key}")
+
+        index = bundle_index(self.m, timestamp, members)
+        writer = MultipartWriter(self.client, self.m.aws_bucket_name, key, self.multipart_chunksize, self.max_concurrency)
+
+        # Closing uploads the last part and completes the upload, so a failure there has to abort it too
+        try:
+            write_bundle(writer, bundle_format, index, members)
+            writer.close()
+        except Exception:
+            self.l.error(f"Failed to upload the bundle - aborting the upload to {key}")
+            writer.abort()
+            raise
+        self.l.info(f"Uploaded {len(members)} file(s) in a single {writer.size} byte bundle")
+
+        return writer.size
@@ -0,0 +1,176 @@
+import functools
+import glob
+import gzip
+import hashlib
+import json
+import os
+
+from lib.constants import file_digest
+from lib.input.Archive import ArchiveMember
+from lib.issues.Issue import Issue
+
+# Any change to these files could change what is parsed, so they make up the parser version
+VERSIONED_SOURCES = [
+    "lib/parsers/*.py",
+    "lib/issues/Issue.py",
+    "lib/constants.py"
+]
+
+
+@functools.lru_cache(maxsize=None)
+def parser_version():
+    """
+    Returns a digest of the parser source code, so cached results are invalidated when the parsers change.
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    digest = hashlib.sha256()
+    for pattern in VERSIONED_SOURCES:
+        for source in sorted(glob.glob(os.path.join(root, pattern))):
+            digest.update(os.path.relpath(source, root).encode("utf-8"))
+            digest.update(file_digest(source).encode("utf-8"))
+    return digest.hexdigest()
+
+
+# The Issue fields saved in each entry - uids, fails and baseline are left out, as they're recomputed when loaded
+ISSUE_FIELDS = [
+    "issue_type",
+    "tool_name",
+    "title",
+    "description",
+    "location",
+    "recommendation",
+    "raw_output",
+    "severity",
+    "cve_value",
+    "custom"
+]
+
+
+class ParseCache:
+    """
+    Stores the issues parsed from each input file in a cache directory (i.e. one persisted by CircleCI's save_cache and
+    restore_cache), keyed by the file's digest, the parser version and the config that affects parsing. Files that were
+    parsed by a previous run are then loaded from the cache rather than parsed again.
+
+    Each entry is a gzipped JSON document holding the file's issues, and how many findings the parser skipped for being out
+    of scope or allowlisted. Entries are plain data (the directory may be restored from a cache shared with other branches),
+    so loading one can't run code.
+
+    Parsed issues link to the commit being scanned, but the commit isn't part of the key - so unchanged tool output is still
+    a hit after i.e. a docs-only commit. Instead, the commit is saved with the entry and links to it are moved onto the
+    current commit when the entry is loaded.
+    """
+
+    def __init__(self, logger, directory):
+        self.l = logger
+        self.directory = directory
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.version = parser_version()
+        self.hits = 0
+        self.misses = 0
+
+
+    def __config(self, metadata, issue_holder):
+        """
+        Returns the settings that change what the parsers produce.
+        """
+
+        config = {
+            "repository_url": metadata.repository_url,
+            "working_directory": metadata.working_directory,
+            "jira": metadata.jira,
+            "gitleaks": metadata.gitleaks,
+            "scope": None,
+            "allowlist": None
+        }
+
+        if issue_holder.scope is not None:
+            config["scope"] = sorted(issue_holder.scope.paths)
+
+        if issue_holder.allowlist is not None:
+            config["allowlist"] = [
+                sorted(issue_holder.allowlist.ids),
+                issue_holder.allowlist.pattern.pattern if issue_holder.allowlist.pattern is not None else ""
+            ]
+
+        return config
+
+
+    def key(self, input_file, metadata, issue_holder):
+        digest = hashlib.sha256()
+        if isinstance(input_file, ArchiveMember):
+            digest.update(input_file.digest().encode("utf-8"))
+        else:
+            digest.update(file_digest(input_file.name).encode("utf-8"))
+        digest.update(os.path.basename(input_file.name).encode("utf-8"))
+        digest.update(self.version.encode("utf-8"))
+        digest.update(json.dumps(self.__config(metadata, issue_holder), sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+
+    def __location(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+
+    def load(self, key, metadata):
+        """
+        Returns the cached entry for a key, or None if it hasn't been cached.
+        """
+
+        location = self.__location(key)
+        if not os.path.exists(location):
+            self.misses += 1
+            return None
+
+        try:
+            with gzip.open(location, "rt", encoding="utf-8") as cache_file:
+                entry = json.load(cache_file)
+            issues = [self.__issue(fields, entry["commit_hash"], metadata) for fields in entry["issues"]]
+        except (OSError, EOFError, ValueError, KeyError, TypeError, AttributeError) as error:
+            self.l.warning(f"Ignoring unreadable cache entry {location}: {error}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            "issues": issues,
+            "scope_skipped": entry["scope_skipped"],
+            "allowlist_skipped": entry["allowlist_skipped"]
+        }
+
+
+    @staticmethod
+    def __issue(fields, commit_hash, metadata):
+        """
+        Rebuilds an issue from a cache entry, pointing links to the commit the entry was parsed at to the current commit.
+        """
+
+        fields = {name: fields[name] for name in ISSUE_FIELDS}
+
+        cached_link = f"{metadata.repository_url}/blob/{commit_hash}/"
+        if commit_hash != metadata.commit_hash and fields["location"].startswith(cached_link):
+            fields["location"] = f"{metadata.repository_url}/blob/{metadata.commit_hash}/" + fields["location"][len(cached_link):]
+
+        # The uid is recomputed, as it can be based on the location
+        return Issue(**fields)
+
+
+    def store(self, key, entry, metadata):
+        # Write to a temporary file first, so an interrupted run can't leave a partial entry behind
+        location = self.__location(key)
+        temporary_location = f"{location}.{os.getpid()}.tmp"
+
+        document = {
+            "commit_hash": metadata.commit_hash,
+            "scope_skipped": entry["scope_skipped"],
+            "allowlist_skipped": entry["allowlist_skipped"],
+            "issues": [{name: getattr(issue, name) for name in ISSUE_FIELDS} for issue in entry["issues"]]
+        }
+
+        with gzip.open(temporary_location, "wt", encoding="utf-8") as cache_file:
+            json.dump(document, cache_file, default=str)
+        os.replace(temporary_location, location)
@@ -5,6 +5,8 @@ import json
 import os
 import re
 
+from ..input.Pipe import PipeInput
+from ..issues.Correlator import Correlator, LINE_WINDOW
 from ..issues.IssueHolder import IssueHolder
 from ..issues.Jira import Jira
 
@@ -24,169 +26,318 @@ class CoreParser:
         "trivy": "trivy"
     }
 
-    def gosec(self, i_file):
+    def gosec(self, i_file, issue_holder):
         from lib.parsers import gosec
-        gosec.parse(i_file, self.issue_holder, self.l, self.m)
+        gosec.parse(i_file, issue_holder, self.l, self.m)
 
-    def nancy(self, i_file):
+    def nancy(self, i_file, issue_holder):
         from lib.parsers import nancy
-        nancy.parse(i_file, self.issue_holder, self.l)
+        nancy.parse(i_file, issue_holder, self.l)
 
-    def burrow(self, burrow_file):
+    def burrow(self, burrow_file, issue_holder):
         from lib.parsers import burrow
-        burrow.parse(burrow_file, self.issue_holder, self.l)
+        burrow.parse(burrow_file, issue_holder, self.l)
 
-    def gitleaks(self, gitleaks_file):
+    def gitleaks(self, gitleaks_file, issue_holder):
         from lib.parsers import gitleaks
-        gitleaks.parse(gitleaks_file, self.issue_holder, self.l, self.m)
+        gitleaks.parse(gitleaks_file, issue_holder, self.l, self.m)
 
-    def snyk_node(self, i_file):
+    def snyk_node(self, i_file, issue_holder):
         from lib.parsers import snyk
-        snyk.parse_node(i_file, self.issue_holder, self.l)
+        snyk.parse_node(i_file, issue_holder, self.l, self.m)
 
-    def insider(self, insider_file):
+    def insider(self, insider_file, issue_holder):
         from lib.parsers import insider
-        insider.parse(insider_file, self.issue_holder, self.l)
+        insider.parse(insider_file, issue_holder, self.l)
 
-    def shed(self, shed_file):
+    def shed(self, shed_file, issue_holder):
         from lib.parsers import shed
-        shed.parse(shed_file, self.issue_holder, self.l)
+        shed.parse(shed_file, issue_holder, self.l)
 
-    def trivy(self, trivy_file):
+    def trivy(self, trivy_file, issue_holder):
         from lib.parsers import trivy
-        trivy.parse(trivy_file, self.issue_holder, self.l)
+        trivy.parse(trivy_file, issue_holder, self.l, self.m)
 
-    def __parse(self, i_file):
+    def sarif(self, sarif_file, issue_holder):
+        from lib.parsers import sarif
+        sarif.parse(sarif_file, issue_holder, self.l, self.m)
+
+    def __parse(self, i_file, issue_holder):
+        """
+        Parses a file, loading its issues from the parse cache instead if it has been parsed before.
+        """
+
+        # Piped output can only be read once, so there's nothing to compute a cache key from
+        if self.cache is None or isinstance(i_file, PipeInput):
+            self.__run_parser(i_file, issue_holder)
+            return
+
+        key = self.cache.key(i_file, self.m, issue_holder)
+        entry = self.cache.load(key, self.m)
+        scope, allowlist = issue_holder.scope, issue_holder.allowlist
+
+        if entry is not None:
+            issues = entry["issues"]
+            self.l.info(f"Loaded {len(issues)} issue(s) for {os.path.basename(i_file.name)} from the cache")
+
+            # The findings the parser skipped aren't in the cache, but still count as skipped
+            if scope is not None:
+                scope.skipped += entry["scope_skipped"]
+            if allowlist is not None:
+                allowlist.skipped += entry["allowlist_skipped"]
+        else:
+            scope_skipped = scope.skipped if scope is not None else 0
+            allowlist_skipped = allowlist.skipped if allowlist is not None else 0
+
+            # Parse into an empty holder so only this file's issues are cached
+            file_issue_holder = IssueHolder(self.l)
+            file_issue_holder.scope = scope
+            file_issue_holder.allowlist = allowlist
+            self.__run_parser(i_file, file_issue_holder)
+
+            issues = file_issue_holder.get_issues()
+            self.cache.store(key, {
+                "issues": issues,
+                "scope_skipped": scope.skipped - scope_skipped if scope is not None else 0,
+                "allowlist_skipped": allowlist.skipped - allowlist_skipped if allowlist is not None else 0
+            }, self.m)
+
+        issue_holder.extend(issues)
+
+
+    def __run_parser(self, i_file, issue_holder):
         """
         Iterates through a dictionary of tools that can be parsed and compares their associated filename patterns with the file currently being processed.
         """
 
         self.l.info(f"Parsing {os.path.basename(i_file.name)}")
 
+        # SARIF output is parsed the same way regardless of the tool that generated it
+        if i_file.name.endswith(".sarif"):
+            self.l.debug("> Tool identified: SARIF")
+            self.sarif(i_file, issue_holder)
+            return
+
+        # Only the file's own name is matched, as the directories (or archive) it's in can contain tool names too
+        filename = os.path.basename(i_file.name)
+
         # Get the tool name ("Snyk [Node]" for example) and its associated matching filename ("snyk_node"), both from parsed_tools in KV format
         for toolname, filename_pattern in self.parsable_tools.items():
 
             # Alright, we've found a file from a tool that we support
-            if filename_pattern in i_file.name:
+            if filename_pattern in filename:
 
                 # Lets obtain a link to the correct tool parser we'll be using. Thanks getattr,
                 self.l.debug(f"> Tool identified: {toolname}")
 
                 file_parser_method = getattr(self, filename_pattern)
-                file_parser_method(i_file)
+                file_parser_method(i_file, issue_holder)
+                break
 
 
     def parse(self, input_files):
         for input_file in input_files:
-            self.__parse(input_file)
+            self.__parse(input_file, self.issue_holder)
 
+        self.report_parsing()
 
-    def check_threshold(self, fail_threshold):
+
+    def report_parsing(self):
+        """
+        Reports how many files were loaded from the parse cache, and how many findings the parsers skipped for being outside
+        of the changed files or allowlisted.
         """
-        Check if an issue severity threshold has been set and if so, return an error code equal to a map against the issues to be reported.
 
-        The error code returned depends on the issue with the highest severity. 5 = critical, 4 = high, etc.
+        if self.cache is None and self.issue_holder.scope is None and self.issue_holder.allowlist is None:
+            return
 
-        tl;dr if fail_threshold = "high", return 4 if we only find high issues, and return 5 if we find a critical. if don't find either, return 0.
+        if self.cache is not None:
+            self.l.info(f"Files loaded from the parse cache: {self.cache.hits} (parsed: {self.cache.misses})")
+
+        if self.issue_holder.scope is not None:
+            self.l.info(f"Number of findings outside of the changed files skipped: {self.issue_holder.scope.skipped}")
+
+        if self.issue_holder.allowlist is not None:
+            self.l.info(f"Number of allowlisted findings skipped while parsing: {self.issue_holder.allowlist.skipped}")
+
+        self.l.spacer()
+
+
+    def iter_parse(self, input_files):
+        """
+        Parses each file in turn, yielding its issues as soon as the file has been parsed rather than storing them.
         """
 
-        # Store the return value of the script
-        exit_code = 0
+        for input_file in input_files:
+            file_issue_holder = IssueHolder(self.l)
+            file_issue_holder.scope = self.issue_holder.scope
+            file_issue_holder.allowlist = self.issue_holder.allowlist
+            self.__parse(input_file, file_issue_holder)
+            yield from file_issue_holder.get_issues()
+
+
+    # Save a dictionary of what error codes to return.
+    fail_codes = {
+        "critical": 5,
+        "high": 4,
+        "medium": 3,
+        "low": 2,
+        "informational": 1
+    }
 
-        # For output cleanliness, only report a failure once
-        fail_outputted = False
+    def __check_fail_branches(self):
+        """
+        If fail_branches was defined, check if the branch we're in matches one of them.
+        """
 
-        # If fail_branches was defined, check if the branch we're in matches one of them.
         # If it does not, we won't fail.
         # If it matches, continue.
         if len(self.m.fail_branches) > 0:
             # self.l.debug("fail_branches has been defined")
             self.l.info(f"Branch: {self.m.branch}")
-            print()
+            self.l.spacer()
             if [branch for branch in self.m.fail_branches if self.m.branch.startswith(branch)]:
                 self.l.info("> We are in a branch that will fail builds")
             else:
                 self.l.info("> fail_branches configured but we're not in one - disabling failing")
 
-        # Only go down this route if a threshold has not been set.
-        if fail_threshold != "off":
 
-            # Save a dictionary of what error codes to return.
-            fail_codes = {
-                "critical": 5,
-                "high": 4,
-                "medium": 3,
-                "low": 2,
-                "informational": 1
-            }
+    def __report_failure(self, issue):
+        """
+        Reports a failing issue in shorthand form.
+        """
+
+        reporting_tool = issue["tool_name"]
+        title = issue["title"].lower()
+        issue_severity = issue["severity"].lower()
+        description = issue["description"].split("\n")[0]
+        remediation = issue["recommendation"].split(".\n")[0] + "."
+        location = issue["location"]
+        uid = issue["uid"]
+
+        self.l.spacer()
+        self.l.info(f"tool: {reporting_tool}")
+        self.l.info(f"title: {title}")
+        self.l.info(f"severity: {issue_severity}")
+        self.l.info(f"description: {description}")
+        self.l.info(f"recommendation: {remediation}")
+        self.l.info(f"location(s): {location}")
+        self.l.info(f"uid: {uid}")
+
+
+    def check_issue_threshold(self, issue, fail_threshold):
+        """
+        Marks a single issue as failing if its severity is greater than or equal to the threshold, returning its fail code
+        (or 0 if it doesn't fail).
+        """
 
-            fail_threshold_value = fail_codes[fail_threshold]
+        if fail_threshold == "off":
+            return 0
+
+        # When comparing against a baseline, only issues introduced since then can fail
+        if issue.baseline == "existing":
+            return 0
+
+        severity_value = self.fail_codes[issue.severity.lower()]
+
+        if severity_value >= self.fail_codes[fail_threshold]:
+            # mark the issue as failing
+            issue.fails = True
+            return severity_value
+
+        return 0
+
+
+    def check_threshold(self, fail_threshold):
+        """
+        Check if an issue severity threshold has been set and if so, return an error code equal to a map against the issues to be reported.
+
+        The error code returned depends on the issue with the highest severity. 5 = critical, 4 = high, etc.
+
+        tl;dr if fail_threshold = "high", return 4 if we only find high issues, and return 5 if we find a critical. if don't find either, return 0.
+        """
+
+        # Store the return value of the script
+        exit_code = 0
+
+        # For output cleanliness, only report a failure once
+        fail_outputted = False
+
+        self.__check_fail_branches()
+
+        # Only go down this route if a threshold has not been set.
+        if fail_threshold != "off":
 
             # Create a list to hold any failing issues
             fail_issues = []
 
-            # For each issue, convert the severity into its fail_code
+            # For each issue, convert the severity into its fail_code
             # equivalent value.
             # If the value is greater than or equal to the fail_code
             # value of the set threshold, save it to a temporary array.
             for issue in self.issue_holder.get_issues():
 
-                issue_dict = issue.dictionary()
-
-                severity = issue_dict["severity"].lower()
-                severity_value = fail_codes[severity]
+                severity_value = self.check_issue_threshold(issue, fail_threshold)
 
                 # Save this issue if it passes the threshold
-                if severity_value >= fail_threshold_value:
+                if severity_value > 0:
 
                     if not fail_outputted:
                         self.l.debug(f"Issue severity threshold met, found an issue with severity_value {severity_value}")
                         fail_outputted = True
 
-                    # mark the issue as failing
-                    # issue.set_fails(True)
-                    issue.fails = True
-
                     # If we find an issue with a greater severity than what
                     # we've found so far, set error_code to its severity.
-					# We'll return this at the end.
+                    # We'll return this at the end.
                     if severity_value > exit_code:
                         exit_code = severity_value
 
-                    fail_issues.append(issue_dict)
+                    fail_issues.append(issue.dictionary())
 
-            # Before we hard fail, explain why we failed and report the issues in shorthand form
+            # Before we hard fail, explain why we failed and report the issues in shorthand form
             if exit_code > 0:
 
                 self.l.warning(f"At least one issue has been found with a severity that is greater than or equal to {fail_threshold}!")
 
                 for issue in fail_issues:
-
-                    reporting_tool = issue["tool_name"]
-                    title = issue["title"].lower()
-                    issue_severity = issue["severity"].lower()
-                    description = issue["description"].split("\n")[0]
-                    remediation = issue["recommendation"].split(".\n")[0] + "."
-                    location = issue["location"]
-                    uid = issue["uid"]
-
-                    issue["fails"] = True
-
-                    print()
-                    self.l.info(f"tool: {reporting_tool}")
-                    self.l.info(f"title: {title}")
-                    self.l.info(f"severity: {issue_severity}")
-                    self.l.info(f"description: {description}")
-                    self.l.info(f"recommendation: {remediation}")
-                    self.l.info(f"location(s): {location}")
-                    self.l.info(f"uid: {uid}")
+                    self.__report_failure(issue)
                 
-            print()
+            self.l.spacer()
 
         # Return error_code as the error code :)
         return exit_code
 
 
+    def is_allowlisted(self, issue, allowlisted_issues):
+        """
+        Checks if an issue's id, or its location, has been allowlisted.
+        """
+
+        # for ids, check if the issue's id is in a list of ids.
+        if "ids" in allowlisted_issues and allowlisted_issues["ids"] is not None:
+            if issue.hash in allowlisted_issues["ids"]:
+                self.l.debug(f"Found and allowing {issue.hash}...")
+                self.l.debug(f"> tool: {issue.tool_name}")
+                self.l.debug(f"> title: {issue.title}")
+                self.l.debug(f"> location(s): {issue.location}")
+                return True
+
+        # for paths, check if an allowed path is a substring present in an issue's path
+        if "paths" in allowlisted_issues and allowlisted_issues["paths"] is not None:
+            for path in allowlisted_issues["paths"]:
+                if path in issue.location:
+                    if self.l.verbose:
+                        self.l.spacer()
+                    self.l.debug(f"Issue found in an allowed path, omitting...")
+                    self.l.debug(f"> tool: {issue.tool_name}")
+                    self.l.debug(f"> title: {issue.title}")
+                    self.l.debug(f"> location(s): {issue.location}")
+                    self.l.debug(f"> allowlist trigger: {path}")
+                    return True
+
+        return False
+
+
     def check_allowlists(self, allowlisted_issues):
         """
         Loads the local allowlist from summit.yml and checks if any issues to be reported are within. If so, omit the issue from reporting (but report it in verbose mode).
@@ -194,102 +345,186 @@ class CoreParser:
 
         self.l.info("Checking if any issues or paths are allowlisted")
 
-        removed_issues = 0
-
-        # deal with ids
-        if "ids" in allowlisted_issues:
-            counter = 0
-            # Repeatedly go through the list of issues until we've gotten rid of all the allowed
-            # issues
-            while counter != len(self.issue_holder.get_issues()) - 1:
-                issue = self.issue_holder.get_issues()[counter].dictionary()
-                if issue["uid"] in allowlisted_issues["ids"]:
-                    self.l.debug(f"Found and allowing {issue['uid']}...")
-                    self.l.debug(f"> tool: {issue['tool_name']}")
-                    self.l.debug(f"> title: {issue['title']}")
-                    self.l.debug(f"> location(s): {issue['location']}")
-                    del self.issue_holder.get_issues()[counter]
-                    counter = 0
-                    removed_issues += 1
-                else:
-                    counter += 1
-
-        # deal with paths - these are different from checking ids.
-        # for ids, check if the issue's id is in a list of ids.
-        # for paths, check if an allowed path is a substring present in an issue's path
-        if "paths" in allowlisted_issues:
-            paths = allowlisted_issues["paths"]
-            for path in paths:
-                counter = 0
-                while counter != len(self.issue_holder.get_issues()) - 1:
-                    issue = self.issue_holder.get_issues()[counter].dictionary()
-                    if path in issue["location"]:
-                        if self.l.verbose:
-                            print()
-                        self.l.debug(f"Issue found in an allowed path, omitting...")
-                        self.l.debug(f"> tool: {issue['tool_name']}")
-                        self.l.debug(f"> title: {issue['title']}")
-                        self.l.debug(f"> location(s): {issue['location']}")
-                        self.l.debug(f"> allowlist trigger: {path}")
-                        del self.issue_holder.get_issues()[counter]
-                        counter = 0
-                        removed_issues += 1
-                    else:
-                        counter += 1
+        issues = self.issue_holder.get_issues()
+        self.issue_holder.findings_list = [
+            issue for issue in issues if not self.is_allowlisted(issue, allowlisted_issues)
+        ]
+        removed_issues = len(issues) - self.issue_holder.size()
 
         self.l.debug("Finished checking allowed issues")
         self.l.info(f"Number of allowlisted issues removed from report: {removed_issues}")
-        print()
+        self.l.spacer()
 
 
-    def check_jira(self):
+    def correlate(self):
+        """
+        Merges issues that multiple tools reported for the same problem, depending on what was enabled in the config file.
+        """
+
+        correlator = Correlator(self.l, self.issue_holder)
+
+        if self.m.correlation.get("dependencies", False):
+            correlator.dependencies()
+
+        if self.m.correlation.get("locations", False):
+            correlator.locations(
+                self.m.working_directory,
+                self.m.correlation.get("line_window", LINE_WINDOW)
+            )
+
+
+    def check_baseline(self, baseline):
+        """
+        Classifies each issue as new or existing compared to a previous run, and adds the comparison (including the issues
+        that have since been fixed) to the metadata payload.
+        """
+
+        self.l.info(f"Comparing issues against the baseline")
+
+        # Issues haven't been deduplicated yet, so duplicates are given the classification of the first issue with their uid
+        classifications = {}
+        for issue in self.issue_holder.get_issues():
+            if issue.hash not in classifications:
+                baseline.classify(issue)
+                classifications[issue.hash] = issue.baseline
+            issue.baseline = classifications[issue.hash]
+
+        self.m.payload["baseline"] = baseline.summary()
+        self.__report_baseline()
+
+
+    def __report_baseline(self):
+        summary = self.m.payload["baseline"]
+        self.l.info(f"New issues: {summary['new']}")
+        self.l.info(f"Existing issues: {summary['existing']}")
+        self.l.info(f"Fixed issues: {summary['fixed_count']}")
+        self.l.spacer()
+
+
+    def check(self, allowlisted_issues, fail_threshold, baseline = None):
+        """
+        Runs every check against the parsed issues (allowlists, JIRA, correlation and the baseline, if enabled), returning
+        the exit code from the fail threshold.
+        """
+
+        self.check_allowlists(allowlisted_issues)
+        if self.m.jira:
+            self.check_jira()
+        self.correlate()
+        if baseline is not None:
+            self.check_baseline(baseline)
+
+        return self.check_threshold(fail_threshold)
+
+
+    def get_jira_accepted_hashes(self):
+        """
+        Returns the hashes of issues whose JIRA sub-task tickets have an accepted status (i.e. false positive).
+        """
+
         self.l.info("Checking JIRA for issues matching raised tickets")
         j = Jira(self.l, self.m)
 
+        accepted_hashes = set()
+
         if j.connect():
             self.l.debug("Connected to JIRA")
 
-            removed_issues = 0
-
             repository = j.get_repository()
             if repository is None:
                 self.l.error("Repository ticket not found!")
-                return False
+                return accepted_hashes
     
             self.l.info(f"Found repository ticket: {repository.key} - {repository.fields.summary}")
             
             subtasks = j.get_subtasks(repository.key)
             if subtasks is not None:
-                for subtask in j.get_subtasks(repository.key):
+                for subtask in subtasks:
                     subtask_issue = j.client.issue(subtask.key)
                     subtask_hash = subtask_issue.raw["fields"][j.jira_config["hash_field"]]
+                    subtask_status = str(subtask_issue.fields.status)
+
+                    if subtask_status.lower() in j.jira_config["accepted_statuses"]:
+                        self.l.info(f"> Found sub-task ticket {subtask.key} with hash ending in {str(subtask_hash)[-5:]}")
+                        self.l.info(f'>>> Ticket has a status of "{subtask_status.lower()}", which is accepted')
+                        accepted_hashes.add(subtask_hash)
+
+        return accepted_hashes
+
+
+    def check_jira(self):
+        accepted_hashes = self.get_jira_accepted_hashes()
+
+        issues = self.issue_holder.get_issues()
+        self.issue_holder.findings_list = [
+            issue for issue in issues if issue.hash not in accepted_hashes
+        ]
+        removed_issues = len(issues) - self.issue_holder.size()
+
+        self.l.debug("Finished checking JIRA tickets")
+        self.l.info(f"Number of JIRA-allowed issues removed from report: {removed_issues}")
+        self.l.spacer()
+
+
+    def stream(self, input_files, allowlisted_issues, fail_threshold, baseline = None):
+        """
+        Yields finalised issues (allowlisted, checked against JIRA, deduplicated and marked if failing) as each file is parsed,
+        without storing them in the issue holder. The exit code is available in self.exit_code once the generator has finished.
+
+        Correlation needs every issue at once, so it isn't carried out in this mode.
+        """
+
+        if self.m.correlation.get("dependencies", False) or self.m.correlation.get("locations", False):
+            self.l.warning("Correlation is not supported when streaming the report - skipping")
+
+        accepted_hashes = set()
+        if self.m.jira:
+            accepted_hashes = self.get_jira_accepted_hashes()
+
+        self.__check_fail_branches()
+
+        self.exit_code = 0
+        seen_hashes = set()
+        removed_issues = 0
+        fail_outputted = False
+
+        for issue in self.iter_parse(input_files):
+
+            if self.is_allowlisted(issue, allowlisted_issues) or issue.hash in accepted_hashes:
+                removed_issues += 1
+                continue
+
+            if issue.hash in seen_hashes:
+                continue
+            seen_hashes.add(issue.hash)
+
+            if baseline is not None:
+                baseline.classify(issue)
+
+            severity_value = self.check_issue_threshold(issue, fail_threshold)
+            if severity_value > 0:
+                if not fail_outputted:
+                    self.l.warning(f"At least one issue has been found with a severity that is greater than or equal to {fail_threshold}!")
+                    fail_outputted = True
+                self.__report_failure(issue.dictionary())
+                self.exit_code = max(self.exit_code, severity_value)
+
+            yield issue
+
+        self.l.info(f"Number of allowlisted or JIRA-allowed issues removed from report: {removed_issues}")
+        self.l.spacer()
+
+        self.report_parsing()
+
+        if baseline is not None:
+            self.m.payload["baseline"] = baseline.summary()
+            self.__report_baseline()
 
-                    # okay now we iterate through the issue_holder until we've gone through every subtask.
-                    # use more memory, but use less requests (and latency i suppose)
-                    counter = 0
-                    while counter != len(self.issue_holder.get_issues()):
-                        issue = self.issue_holder.get_issues()[counter].dictionary()
-                        issue_hash = issue["uid"]
-
-                        if subtask_hash == issue_hash:
-                            self.l.info(f"> Found sub-task ticket {subtask.key} for issue \"{issue['title']}\" with hash ending in {issue_hash[-5:]}")
-                            subtask_status = str(subtask_issue.fields.status)
-                            self.l.info(f'>>> Ticket has a status of "{subtask_status.lower()}"')
-                            if subtask_status.lower() in j.jira_config["accepted_statuses"]:
-                                self.l.info(">>>>>> This status is accepted, removing from issue list")
-                                del self.issue_holder.get_issues()[counter]
-                                counter = 0
-                                removed_issues += 1
-                            else:
-                                counter += 1
-                        else:
-                            counter += 1
-
-                self.l.debug("Finished checking JIRA tickets")
-                self.l.info(f"Number of JIRA-allowed issues removed from report: {removed_issues}")
-                print()
 
     def __init__(self, logger, metadata, issue_holder):
         self.l = logger
         self.m = metadata
         self.issue_holder = issue_holder
+
+        # Set to a ParseCache to reuse issues parsed by previous runs
+        self.cache = None
@@ -0,0 +1,66 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# A pool that lives across parses (i.e. in batch mode), rather than one being started for each report
+shared_pool = None
+
+
+def start_shared_pool(workers):
+    global shared_pool
+    if workers > 1:
+        shared_pool = ProcessPoolExecutor(max_workers=workers)
+
+
+def shutdown_shared_pool():
+    global shared_pool
+    if shared_pool is not None:
+        shared_pool.shutdown()
+        shared_pool = None
+
+
+def map_targets(worker, targets, workers, *arguments):
+    """
+    Runs worker(target, *arguments) for each target in a pool of processes, yielding the results in the original target order.
+
+    targets can be a generator (i.e. targets streamed out of a large report); only a bounded window of targets is held in flight at
+    any one time. The pool is only started once a second target shows up, so single-target reports don't pay for it.
+    """
+
+    targets = iter(targets)
+
+    first = next(targets, None)
+    if first is None:
+        return
+
+    second = next(targets, None)
+    if second is None or workers <= 1:
+        yield worker(first, *arguments)
+        if second is not None:
+            yield worker(second, *arguments)
+            for target in targets:
+                yield worker(target, *arguments)
+        return
+
+    window = workers * 2
+
+    if shared_pool is not None:
+        yield from __map_window(shared_pool, window, worker, first, second, targets, arguments)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from __map_window(pool, window, worker, first, second, targets, arguments)
+
+
+def __map_window(pool, window, worker, first, second, targets, arguments):
+    pending = deque()
+
+    pending.append(pool.submit(worker, first, *arguments))
+    pending.append(pool.submit(worker, second, *arguments))
+
+    for target in targets:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(worker, target, *arguments))
+
+    while pending:
+        yield pending.popleft().result()
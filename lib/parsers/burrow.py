@@ -1,5 +1,7 @@
 import json
 
+from ..constants import line_range
+
 def parse(burrow_file, issue_holder, logger):
     """
     Goes through burrow tool output and passes each reported issue to Reporter.
@@ -23,6 +25,9 @@ def parse(burrow_file, issue_holder, logger):
     findings = json_object["findings"]
 
     for issue in findings:
+
+        if not issue_holder.in_scope(issue["file"]):
+            continue
         
         title = issue["match"]
         location = issue["file"]
@@ -37,6 +42,13 @@ def parse(burrow_file, issue_holder, logger):
         ):
             location += ":" + str(issue["line"])
 
+        custom = {
+            "type": "secret",
+            "rule": title,
+            "filepath": issue["file"],
+            "line_range": line_range(issue["line"]) if isinstance(issue["line"], int) else [0, 0]
+        }
+
         issue_holder.add(
             issue_type,
             tool_name,
@@ -44,8 +56,8 @@ def parse(burrow_file, issue_holder, logger):
             description,
             location,
             recommendation,
-            filename,
-            raw_output = issue
+            raw_output = issue,
+            custom = custom
         )
 
     logger.debug(f"> burrow: {len(findings)} issues reported\n")
\ No newline at end of file
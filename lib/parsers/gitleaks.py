@@ -1,9 +1,12 @@
-import json
-
 from ..constants import an
+from ..input.Streaming import iter_prefixed
+from ..issues.Issue import Issue
 
 MAX_LINE_LENGTH = 100
 
+# The number of offences listed per file when merging issues (gitleaks: max_offences in the config file)
+MAX_OFFENCES = 10
+
 ISSUE_TYPE = "secrets"
 TOOL_NAME = "gitleaks"
 
@@ -15,60 +18,100 @@ It is recommended to make use of secrets management tools/functionality such as
 AWS Secrets Manager to retrieve sensitive values or credentials when required, rather than hardcoding contents.
 """
 
+def normalise(issue):
+    """
+    gitleaks v8 changed the report format (File, StartLine, Secret, RuleID etc.) - converts either format into the v7 field names
+    used throughout this parser.
+    """
+
+    if "File" not in issue:
+        return issue
+
+    offender = issue.get("Secret", "")
+    # v8 reports filename/path rules without a secret or line
+    if not offender and issue.get("StartLine", 0) == 0:
+        offender = f'Filename/path offender: {issue["File"]}'
+
+    return {
+        "file": issue["File"],
+        "lineNumber": issue.get("StartLine", 0),
+        "line": issue.get("Line") or issue.get("Match", ""),
+        "offender": offender,
+        "rule": issue.get("RuleID") or issue.get("Description", ""),
+        "commit": issue.get("Commit", "")
+    }
+
+
+def offending_line(issue):
+    """
+    Returns the line that triggered the rule, or just the specific trigger if the line is too long (i.e. minified JS).
+    """
+
+    if len(issue["line"]) > MAX_LINE_LENGTH:
+        return issue["offender"]
+    return issue["line"]
+
+
 def parse_individual(gitleaks_issues, issue_holder, logger, metadata):
     """
     Goes through gitleaks --verbose output, combines them into a proper JSON
     object, then passes each reported issue to Reporter.
     """
 
+    issue_count = 0
+
     for issue in gitleaks_issues:
+        issue = normalise(issue)
+        if not issue_holder.in_scope(issue["file"]):
+            continue
+        issue_count += 1
 
         custom = {
             "type": "single",
             "filename": issue["file"],
-            "line": issue["lineNumber"]
+            "filepath": issue["file"],
+            "line": issue["lineNumber"],
+            "line_range": [issue["lineNumber"], issue["lineNumber"]],
+            "rule": issue["rule"]
         }
 
         filename = issue["file"].rsplit("/")[-1]
 
         title = f'{issue["rule"]} found at \"{filename}\"'
-        description = f'A potential credential was found in a file. The gitleaks rule that triggered was \"{issue["rule"].lower()}\".'
 
-        # Create the file location for the repository URL
-        location = metadata.repository_url
-        if "/" in issue["file"]:
+        # Rules for a file pattern don't have a line to link to
+        if "Filename/path" in issue["offender"]:
+            location = "N/A"
+
+        # Otherwise we'll set the full file path
+        else:
+            # Create the file location for the repository URL
+            location = metadata.repository_url
             location += f'/blob/{issue["commit"]}/{issue["file"]}'
             if issue["lineNumber"] > 0:
                 location += f'#L{issue["lineNumber"]}'
 
+        # Skip allowlisted issues before building their description
+        uid = Issue.fingerprint(TOOL_NAME, title, location, custom)
+        if issue_holder.is_allowlisted(TOOL_NAME, title, location, custom, uid):
+            continue
+
+        description = f'A potential credential was found in a file. The gitleaks rule that triggered was \"{issue["rule"].lower()}\".'
+
         # Report the issue differently if the rule is for a file pattern
         if "Filename/path" in issue["offender"]:
-            # description += f"\nThe file that triggered this rule was {}"
             description += f'\nThe file that triggered this rule was "{issue["file"]}"'
             description += "\nAs this was a filename/path rule that triggered, please search the repository for matching files and confirm if they are valid."
-            location = "N/A"
 
-        # Otherwise we'll set the full file path, and report the line that triggered
+        # Otherwise report the line that triggered
         else:
 
             description += "\n\nThe offence can be found below:"
 
-            # We might be reporting minified JS, so lets check
-            offending_line = issue["line"]
-            # If the line is too long, we'll just report the specific trigger
-            if len(offending_line) > MAX_LINE_LENGTH:
-                offending_line = issue["offender"]
-
             if metadata.jira:
-                description += "\n{code}\n" + offending_line + "\n{code}"
+                description += "\n{code}\n" + offending_line(issue) + "\n{code}"
             else:
-                description += f'\n{offending_line}\n'
-
-            # Create the file location for the repository URL
-            location = metadata.repository_url
-            location += f'/blob/{issue["commit"]}/{issue["file"]}'
-            if issue["lineNumber"] > 0:
-                location += f'#L{issue["lineNumber"]}'
+                description += f'\n{offending_line(issue)}\n'
 
         issue_holder.add(
             ISSUE_TYPE,
@@ -79,102 +122,173 @@ def parse_individual(gitleaks_issues, issue_holder, logger, metadata):
             RECOMMENDATION,
             severity = SEVERITY,
             raw_output = issue,
-            custom = custom
+            custom = custom,
+            uid = uid
         )
 
-    logger.debug(f"> gitleaks: {len(gitleaks_issues)} issues reported\n")
+    logger.debug(f"> gitleaks: {issue_count} issues reported\n")
+
+
+def compact_lines(lines):
+    """
+    Converts a set of line numbers into a sorted list of [start, end] ranges of consecutive lines.
+    """
+
+    ranges = []
+    for line in sorted(lines):
+        if ranges and line == ranges[-1][1] + 1:
+            ranges[-1][1] = line
+        else:
+            ranges.append([line, line])
+    return ranges
 
 
 def parse_multiple(gitleaks_issues, issue_holder, logger, metadata):
+    """
+    Goes through gitleaks output and merges issues together if they're from the same file.
+
+    Offences are collected per file and the description is only rendered once at the end; to keep descriptions readable for
+    files with thousands of matches (i.e. minified JS) only the first max_offences are listed, alongside a count per rule.
+    """
+
+    max_offences = metadata.gitleaks.get("max_offences", MAX_OFFENCES)
 
     files = {}
+    skipped_files = set()
+    # Every offending line per file (not just the listed offences), so the issue can be correlated on all of them
+    offence_lines = {}
 
     # Merge issues together if they're from the same file
     for issue in gitleaks_issues:
+        issue = normalise(issue)
 
-        if issue["file"] not in files.keys():
-            filename = issue["file"].rsplit("/")[-1]
+        if issue["file"] in skipped_files:
+            continue
+
+        offending_file = files.get(issue["file"])
+        if offending_file is None and not issue_holder.in_scope(issue["file"]):
+            continue
 
-            files[issue["file"]] = {
-                "offences": [
-                    {
-                        "rule": issue["rule"],
-                        "lineNumber": issue["lineNumber"],
-                        "line": issue["line"],
-                        "offender":  issue["offender"],
-                    }
-                ],
-                "title": f"Potential credentials found at \"{filename}\"",
+        if offending_file is None:
+            filename = issue["file"].rsplit("/")[-1]
+            title = f"Potential credentials found at \"{filename}\""
+
+            # Files are checked against the allowlist the first time they're seen, so none of their offences are collected
+            # if the file is allowlisted. The uid only depends on the path, and the file's path is part of the location it
+            # is reported at (the path itself, or its repository URL if it has a line offence), so this check holds for either
+            custom = {"type": "multiple", "filepath": issue["file"]}
+            uid = Issue.fingerprint(TOOL_NAME, title, issue["file"], custom)
+            if issue_holder.is_allowlisted(TOOL_NAME, title, issue["file"], custom, uid):
+                skipped_files.add(issue["file"])
+                continue
+
+            offending_file = files[issue["file"]] = {
+                "offences": [],
+                "omitted_offences": 0,
+                "rule_counts": {},
+                "line_range": [0, 0],
+                "whole_file_rule": False,
+                "title": title,
                 "commit": issue["commit"],
                 "path": issue["file"],
                 "repository_path_known": False,
                 "repository_path": "N/A",
-                "description": f'Potential credentials were found in a file.'
+                "uid": uid
             }
+
+        rule_counts = offending_file["rule_counts"]
+        rule_counts[issue["rule"]] = rule_counts.get(issue["rule"], 0) + 1
+
+        # Whole-file rules don't have a line to report, we just need to remember that one triggered
+        if "Filename/path" in issue["offender"]:
+            offending_file["whole_file_rule"] = True
+            continue
+
+        # Note the first time we see a line offence for the file, which gives us a repository URL to link to
+        if not offending_file["repository_path_known"]:
+            offending_file["repository_path_known"] = True
+            offending_file["repository_path"] = metadata.repository_url + f"/blob/{issue['commit']}/{issue['file']}"
+            offending_file["line_range"] = [issue["lineNumber"], issue["lineNumber"]]
         else:
-            files[issue["file"]]["offences"].append(
+            offending_file["line_range"][0] = min(offending_file["line_range"][0], issue["lineNumber"])
+            offending_file["line_range"][1] = max(offending_file["line_range"][1], issue["lineNumber"])
+
+        offence_lines.setdefault(issue["file"], set()).add(issue["lineNumber"])
+
+        if len(offending_file["offences"]) < max_offences:
+            offending_file["offences"].append(
                 {
                     "rule": issue["rule"],
                     "lineNumber": issue["lineNumber"],
-                    "line": issue["line"],
-                    "offender":  issue["offender"]
+                    "line": offending_line(issue)
                 }
             )
+        else:
+            offending_file["omitted_offences"] += 1
 
-        # Deduce the file path (and tailor the description) if it's not a whole-file rule
-        if "Filename/path" not in issue["offender"]:
+    issue_count = 0
 
-            # Get the repository file URL
-            path = metadata.repository_url
-            path += f"/blob/{files[issue['file']]['commit']}/{issue['file']}"
+    for path, offending_file in files.items():
 
-            # Add an atomic line to the description and save the file URL
-            if not files[issue["file"]]["repository_path_known"]:
-                files[issue["file"]]["description"] += "\n\nMatches for the following gitleaks rule(s) were found:"
-                files[issue["file"]]["repository_path_known"] = True
-                files[issue["file"]]["repository_path"] = path
+        # Files only matched by whole-file rules are reported at their path, as there's no line to link to
+        location = path
+        if offending_file["repository_path_known"]:
+            location = offending_file["repository_path"]
 
-            # Add an entry in the description for this offence
-            files[issue["file"]]["description"] += f"\n{issue['rule']} at line {issue['lineNumber']}:\n- "
-            if len(issue["line"]) > MAX_LINE_LENGTH:
-                files[issue["file"]]["description"] += f"{issue['offender']}\n"
-            else:
-                files[issue["file"]]["description"] += f"{issue['line']}\n"
+            # An allowlisted path may only match the repository URL, which wasn't known when the file was first checked
+            if issue_holder.is_allowlisted(TOOL_NAME, offending_file["title"], location, {"type": "multiple", "filepath": path}, offending_file["uid"]):
+                continue
+
+        description = ["Potential credentials were found in a file."]
+
+        # Add an entry in the description for each offence
+        if offending_file["repository_path_known"]:
+            description.append("\nMatches for the following gitleaks rule(s) were found:")
+            for offence in offending_file["offences"]:
+                description.append(f"{offence['rule']} at line {offence['lineNumber']}:\n- {offence['line']}")
+            if offending_file["omitted_offences"] > 0:
+                description.append(f"+{offending_file['omitted_offences']} more")
+
+            description.append("\nMatches per gitleaks rule:")
+            for rule, count in offending_file["rule_counts"].items():
+                description.append(f"- {rule}: {count}")
 
         # If it's a whole-file rule, tailor the description
-        else:
-            files[issue["file"]]["description"] += f"\nThe file that triggered this rule was \"{issue['file']}\""
-            files[issue["file"]]["description"] += "\nAs this was a filename/path rule that triggered, please search the repository for matching files and confirm if they are valid."
+        if offending_file["whole_file_rule"]:
+            description.append(f"The file that triggered this rule was \"{path}\"")
+            description.append("As this was a filename/path rule that triggered, please search the repository for matching files and confirm if they are valid.")
 
-    for offending_file in files.keys():
+        offending_file["description"] = "\n".join(description) + "\n"
 
         custom = {
             "type": "multiple",
-            "filepath": offending_file
+            "filepath": path,
+            "line_range": offending_file["line_range"],
+            "line_ranges": compact_lines(offence_lines.get(path, set())),
+            "rules": list(offending_file["rule_counts"].keys())
         }
 
-        path = files[offending_file]["path"]
-        if files[offending_file]["repository_path"] is not "N/A":
-            path = files[offending_file]["repository_path"]
-
         issue_holder.add(
             ISSUE_TYPE,
             TOOL_NAME,
-            files[offending_file]["title"],
-            files[offending_file]["description"],
-            path,
+            offending_file["title"],
+            offending_file["description"],
+            location,
             RECOMMENDATION,
             severity = SEVERITY,
-            raw_output = files[offending_file],
-            custom = custom
+            raw_output = offending_file,
+            custom = custom,
+            uid = offending_file["uid"]
         )
+        issue_count += 1
 
-    logger.debug(f"> gitleaks: {len(files)} issues reported\n")
+    logger.debug(f"> gitleaks: {issue_count} issues reported\n")
 
 def parse(gitleaks_file, issue_holder, logger, metadata):
-    gitleaks_issues = json.load(gitleaks_file)
+    # gitleaks outputs a list of findings, so stream them out one at a time
+    gitleaks_issues = (issue for _, issue in iter_prefixed(gitleaks_file, ("item",)))
 
     if metadata.gitleaks and "individual" in metadata.gitleaks and metadata.gitleaks["individual"]:
         parse_individual(gitleaks_issues, issue_holder, logger, metadata)
     else:
-        parse_multiple(gitleaks_issues, issue_holder, logger, metadata)
\ No newline at end of file
+        parse_multiple(gitleaks_issues, issue_holder, logger, metadata)
@@ -1,6 +1,7 @@
 import json
 
-from ..constants import calculate_rating
+from ..constants import calculate_rating, line_range
+from ..issues.Issue import Issue
 
 """
 G101: Look for hard coded credentials
@@ -97,8 +98,13 @@ def parse(gosec_file, issue_holder, logger, metadata):
 
     for issue in issues:
 
+        if not issue_holder.in_scope(issue["file"]):
+            continue
+
         custom = {
-            "type": "generic"
+            "type": "generic",
+            "rule": issue["rule_id"],
+            "line_range": line_range(issue["line"])
         }
 
         severity = "medium"
@@ -130,6 +136,14 @@ def parse(gosec_file, issue_holder, logger, metadata):
         filename = filepath.split("/")[-1]
         custom["filename"] = filename
 
+        # craft the exact location of the issue in the repository
+        location = f'{repository_location}/blob/{commit}/{filepath}#L{line}'
+
+        # Skip allowlisted issues before building their description
+        uid = Issue.fingerprint(tool_name, title, location, custom)
+        if issue_holder.is_allowlisted(tool_name, title, location, custom, uid):
+            continue
+
         description = f"A security issue was identified in line {line} of {filename}. "
 
         if rule_id in rule_id_sets.keys():
@@ -152,9 +166,6 @@ def parse(gosec_file, issue_holder, logger, metadata):
         recommendation = f"Please investigate the reported file and line to confirm the nature of the issue."
         recommendation += f"\n{recommendation_rel}"
 
-        # craft the exact location of the issue in the repository
-        location = f'{repository_location}/blob/{commit}/{filepath}#L{line}'
-
         issue_holder.add(
             issue_type,
             tool_name,
@@ -164,7 +175,8 @@ def parse(gosec_file, issue_holder, logger, metadata):
             recommendation,
             raw_output = issue,
             severity = severity,
-            custom = custom
+            custom = custom,
+            uid = uid
         ) 
 
     logger.debug(f"> gosec: {len(issues)} issues reported\n")
@@ -1,6 +1,7 @@
 import json
 
-from lib.constants import convert_cvss
+from lib.constants import convert_cvss, line_range
+from lib.issues.Issue import Issue
 
 
 def convert_severity(severity):
@@ -27,13 +28,19 @@ def parse(input_file, issue_holder, logger):
 
         for vuln in vulnerabilities:
 
-            custom = {
-                "type": "vulnerability"
-            }
-
             # This is the full path to the file
             location = vuln["classMessage"].split(" (")[0]
 
+            if not issue_holder.in_scope(location):
+                continue
+
+            custom = {
+                "type": "vulnerability",
+                "rule": vuln.get("cwe", ""),
+                "filepath": location,
+                "line_range": line_range(vuln.get("line", 0))
+            }
+
             # This is just the filename
             filename = location.rsplit("/")[-1]
 
@@ -44,6 +51,11 @@ def parse(input_file, issue_holder, logger):
                 custom["line"] = vuln["line"]
                 title += f" found at \"{filename}\""
 
+            # Skip allowlisted issues before building their description
+            uid = Issue.fingerprint(tool_name, title, location, custom)
+            if issue_holder.is_allowlisted(tool_name, title, location, custom, uid):
+                continue
+
             # Combine the issue descriptions from insider-cli first, then add the code after
             description = vuln["longMessage"].split(". ")[1] + "\n"
             if "method" in vuln:
@@ -72,7 +84,8 @@ def parse(input_file, issue_holder, logger):
                 recommendation,
                 raw_output = vuln,
                 severity = severity,
-                custom = custom
+                custom = custom,
+                uid = uid
             )
 
     dependencies = []
@@ -82,10 +95,6 @@ def parse(input_file, issue_holder, logger):
 
         for dependency in dependencies:
 
-            custom = {
-                "type": "dependency"
-            }
-
             if dependency["cves"] != "":
                 cve = dependency["cves"]
             else:
@@ -94,6 +103,23 @@ def parse(input_file, issue_holder, logger):
             title = dependency["title"]
             description = dependency["description"]
             location = title.split(" - ")[1]
+
+            # insider doesn't report which ecosystem the dependency belongs to
+            name, _, version = location.rpartition("@")
+            if name == "":
+                name, version = version, ""
+
+            custom = {
+                "type": "dependency",
+                "packages": [
+                    {
+                        "ecosystem": "",
+                        "name": name,
+                        "version": version,
+                        "cves": [value.strip() for value in dependency["cves"].split(",") if value.strip() != ""]
+                    }
+                ]
+            }
             recommendation = dependency["recomendation"]
             severity = convert_severity(dependency["severity"])
 
@@ -33,6 +33,8 @@ def parse(nancy_file, issue_holder, logger):
 
                 description = "Version " + version + " of " + name + ", a Go dependency pulled by the scanned project, was found to be vulnerable to security issues. Such vulnerabilities have been listed below.\n\n"
 
+                cves = []
+
                 # For each vulnerability, add its title and a short description to
                 # the general description string. Add in the link too for more info.
                 for vulnerability in dependency["Vulnerabilities"]:
@@ -40,8 +42,20 @@ def parse(nancy_file, issue_holder, logger):
                     description += vulnerability["Description"]
                     description += "\nFurther information can be found at " + vulnerability["Reference"] + "\n\n"
 
-                    if vulnerability["Cve"] != "":
-                        cve_value = vulnerability["Cve"]
+                    if vulnerability["Cve"] != "" and vulnerability["Cve"] not in cves:
+                        cves.append(vulnerability["Cve"])
+
+                custom = {
+                    "type": "dependency",
+                    "packages": [
+                        {
+                            "ecosystem": "golang",
+                            "name": name,
+                            "version": version,
+                            "cves": cves
+                        }
+                    ]
+                }
 
                 issue_holder.add(
                     issue_type,
@@ -50,7 +64,8 @@ def parse(nancy_file, issue_holder, logger):
                     description,
                     location,
                     recommendation,
-                    cve_value = cve_value
+                    cve_value = ", ".join(cves) if cves else "n/a",
+                    custom = custom
                 )
 
         logger.debug(f"> nancy: {json_object['num_vulnerable']} issues reported\n")
@@ -0,0 +1,240 @@
+"""
+Parses SARIF (https://sarifweb.azurewebsites.net/) output, which many tools (gosec, trivy, gitleaks v8, semgrep etc.) can generate.
+
+Supporting a new tool that outputs SARIF only requires an entry in tool_mappings, rather than a new parser.
+"""
+
+from ..constants import convert_cvss, relative_path
+from ..input.Streaming import iter_prefixed
+
+DEFAULT_RECOMMENDATION = "Please investigate the reported file and line to confirm the nature of the issue."
+
+# Maps the (lowercased) name of the tool that generated the SARIF output to how its issues should be reported.
+# type is used to populate the issue's custom fields, and credential_rules lists rule ids reporting hardcoded secrets.
+tool_mappings = {
+    "gosec": {
+        "tool_name": "gosec",
+        "issue_type": "code",
+        "credential_rules": ["G101"]
+    },
+    "gitleaks": {
+        "tool_name": "gitleaks",
+        "issue_type": "secrets",
+        "type": "single"
+    },
+    "trivy": {
+        "tool_name": "trivy",
+        "issue_type": "containers"
+    },
+    "semgrep": {
+        "tool_name": "semgrep",
+        "issue_type": "code"
+    },
+    "insider": {
+        "tool_name": "insider",
+        "issue_type": "code"
+    }
+}
+
+# SARIF levels mapped onto our severities, used when a rule doesn't provide a security-severity score
+levels = {
+    "error": "high",
+    "warning": "medium",
+    "note": "low",
+    "none": "informational"
+}
+
+
+def get_mapping(driver):
+    """
+    Returns the mapping for the tool described by a run's tool.driver object.
+    Tools without a mapping are reported under their own name as code issues.
+    """
+
+    name = driver.get("name", "sarif").lower()
+
+    for tool, mapping in tool_mappings.items():
+        if tool in name:
+            return mapping
+
+    return {
+        "tool_name": name,
+        "issue_type": "code"
+    }
+
+
+def build_rule_table(driver):
+    """
+    Creates the lookup tables for a run's rules, by index and by id. These are built once per run.
+    """
+
+    rules = driver.get("rules", [])
+    return rules, {rule["id"]: rule for rule in rules if "id" in rule}
+
+
+def resolve_rule(result, rules, rules_by_id):
+    """
+    Returns the rule id and rule object a result refers to; results can reference their rule by index, id, or both.
+    """
+
+    reference = result.get("rule", {})
+    rule_id = result.get("ruleId", reference.get("id", ""))
+    rule_index = result.get("ruleIndex", reference.get("index", -1))
+
+    if 0 <= rule_index < len(rules):
+        rule = rules[rule_index]
+    elif rule_id in rules_by_id:
+        rule = rules_by_id[rule_id]
+    # Hierarchical ids (i.e. "rule/subrule") fall back to their parent rule
+    else:
+        rule = rules_by_id.get(rule_id.split("/")[0], {})
+
+    if not rule_id:
+        rule_id = rule.get("id", "")
+
+    return rule_id, rule
+
+
+def get_severity(result, rule):
+    """
+    Converts a result into one of our severities. The security-severity score (a CVSS-like value) wins over the SARIF level.
+    """
+
+    for properties in (result.get("properties", {}), rule.get("properties", {})):
+        if "security-severity" in properties:
+            severity = convert_cvss(properties["security-severity"])
+            if severity != "unknown":
+                return severity
+
+    level = result.get("level", rule.get("defaultConfiguration", {}).get("level", "warning"))
+    return levels.get(level, "medium")
+
+
+def get_text(sarif_object, key):
+    """
+    Returns the text of a SARIF message object (i.e. shortDescription), or an empty string.
+    """
+
+    message = sarif_object.get(key, {})
+    return message.get("text", message.get("markdown", ""))
+
+
+def report_result(result, mapping, rules, rules_by_id, issue_holder, metadata):
+    """
+    Passes a single result to Reporter, returning whether it was reported.
+    """
+
+    # Results in files are skipped if the file is out of scope; results without one (i.e. container findings) are kept
+    locations = result.get("locations", [])
+    physical_location = locations[0].get("physicalLocation") if len(locations) > 0 else None
+    if physical_location is not None:
+        if not issue_holder.in_scope(physical_location.get("artifactLocation", {}).get("uri", "")):
+            return False
+
+    rule_id, rule = resolve_rule(result, rules, rules_by_id)
+
+    title = get_text(rule, "shortDescription") or rule.get("name", "") or rule_id
+    message = get_text(result, "message")
+
+    description = f'{message}\nThe {mapping["tool_name"]} rule that triggered was "{rule_id}".'
+    full_description = get_text(rule, "fullDescription")
+    if full_description and full_description != message:
+        description += f"\n\n{full_description}"
+
+    recommendation = get_text(rule, "help") or DEFAULT_RECOMMENDATION
+
+    # Use the first location reported; results without one (i.e. container findings) fall back to the rule
+    location = rule_id
+
+    custom = {
+        "type": mapping.get("type", "generic"),
+        "rule": rule_id,
+        "filename": location,
+        "line": 0,
+        "line_range": [0, 0]
+    }
+
+    if physical_location is not None:
+        path = relative_path(physical_location.get("artifactLocation", {}).get("uri", ""), metadata.working_directory)
+        region = physical_location.get("region", {})
+        line = region.get("startLine", 0)
+
+        custom["filepath"] = path
+        custom["filename"] = path
+        custom["line"] = line
+        custom["line_range"] = [line, region.get("endLine", line)]
+        if rule_id in mapping.get("credential_rules", []):
+            custom["type"] = "credential"
+
+        if metadata.repository_url:
+            location = f"{metadata.repository_url}/blob/{metadata.commit_hash}/{path}"
+            if line > 0:
+                location += f"#L{line}"
+        else:
+            location = path
+            if line > 0:
+                location += f":{line}"
+
+    cve_value = "n/a"
+    if rule_id.upper().startswith("CVE-"):
+        cve_value = rule_id
+
+    issue_holder.add(
+        mapping["issue_type"],
+        mapping["tool_name"],
+        title,
+        description,
+        location,
+        recommendation,
+        raw_output = result,
+        severity = get_severity(result, rule),
+        cve_value = cve_value,
+        custom = custom
+    )
+
+    return True
+
+
+def parse(sarif_file, issue_holder, logger, metadata):
+    """
+    Goes through SARIF output run by run, streaming out each result and passing it to Reporter.
+
+    A run's results reference the rules in its tool.driver, which usually (but not necessarily) comes first; results seen
+    before their run's driver are held back until it has been read, or until the run ends.
+    """
+
+    issue_count = 0
+
+    driver = None
+    pending = []
+
+    for prefix, sarif_object in iter_prefixed(sarif_file, ("runs.item.tool.driver", "runs.item.results.item"), "runs.item"):
+
+        if prefix == "runs.item.tool.driver":
+            driver = sarif_object
+            mapping = get_mapping(driver)
+            rules, rules_by_id = build_rule_table(driver)
+            logger.debug(f"> SARIF run from {driver.get('name', 'an unknown tool')}")
+
+            for result in pending:
+                issue_count += report_result(result, mapping, rules, rules_by_id, issue_holder, metadata)
+            pending = []
+            continue
+
+        # The end of a run - results from a run without a driver are still reported, as a generic tool
+        if prefix == "runs.item":
+            if driver is None and pending:
+                mapping = get_mapping({})
+                for result in pending:
+                    issue_count += report_result(result, mapping, [], {}, issue_holder, metadata)
+            driver = None
+            pending = []
+            continue
+
+        if driver is None:
+            pending.append(sarif_object)
+            continue
+
+        issue_count += report_result(sarif_object, mapping, rules, rules_by_id, issue_holder, metadata)
+
+    logger.debug(f"> sarif: {issue_count} issues reported\n")
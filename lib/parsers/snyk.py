@@ -2,13 +2,16 @@
 Parses output generated by the Snyk CircleCI Orb.
 """
 
-import json
 import re
 from bs4 import BeautifulSoup
 
 from markdown import markdown
 from packaging.version import parse as parse_version
 
+from ..input.Streaming import iter_targets
+from ..issues.IssueHolder import IssueHolder
+from .Parallel import map_targets
+
 
 def node_parse_unresolvables(unparsed_dependencies, reporter):
     """
@@ -156,6 +159,24 @@ def node_parse_unresolvables(unparsed_dependencies, reporter):
         issue_type = "dependencies"
         tool_name = "snyk_node"
 
+        cves = []
+        for unparsed_dependency in merged_dependency["raw_output"]:
+            for cve in unparsed_dependency.get("identifiers", {}).get("CVE", []):
+                if cve not in cves:
+                    cves.append(cve)
+
+        custom = {
+            "type": "dependency",
+            "packages": [
+                {
+                    "ecosystem": "npm",
+                    "name": name,
+                    "version": merged_dependency["version"],
+                    "cves": cves
+                }
+            ]
+        }
+
         reporter.add(
             issue_type,
             tool_name,
@@ -164,12 +185,14 @@ def node_parse_unresolvables(unparsed_dependencies, reporter):
             path,
             issue_recommendation,
             raw_output = merged_dependency["raw_output"],
+            cve_value = ", ".join(cves) if cves else "n/a",
+            custom = custom
         )
 
     return len(merged_dependencies)
 
 
-def node_parse_resolvables(upgradable_dependencies, reporter, project_name):
+def node_parse_resolvables(upgradable_dependencies, reporter, project_name, cves_by_id, packages_by_id):
     """
     Snyk kindly identifies the path of least resistance when scanning a project and reports what dependencies will, when updated, fix as many vulnerabilities as possible (either within itself or its sub-dependencies).
 
@@ -199,9 +222,24 @@ def node_parse_resolvables(upgradable_dependencies, reporter, project_name):
         associated_vulnerabilities = upgrade_details["vulns"]
         description += "\n\n" + dependency_name + " or its sub-dependencies are at risk from the following:"
 
+        cves = []
+
+        # The vulnerable packages (the dependency itself, or its sub-dependencies), mapped to their CVEs
+        packages = {}
+
         # Eeport each vulnerability introduced by the package
         for vuln in associated_vulnerabilities:
 
+            for cve in cves_by_id.get(vuln, []):
+                if cve not in cves:
+                    cves.append(cve)
+
+            for package in packages_by_id.get(vuln, [(dependency_name, dependency_version)]):
+                package_cves = packages.setdefault(package, [])
+                for cve in cves_by_id.get(vuln, []):
+                    if cve not in package_cves:
+                        package_cves.append(cve)
+
             # npm-reported vulnerabilities have an id of npm:<package>:<date> so we can split this via the colon characters.
             npm_format_split = vuln.split(":")
 
@@ -235,6 +273,19 @@ def node_parse_resolvables(upgradable_dependencies, reporter, project_name):
 
         location=upgrade_key
 
+        custom = {
+            "type": "dependency",
+            "packages": [
+                {
+                    "ecosystem": "npm",
+                    "name": name,
+                    "version": version,
+                    "cves": package_cves
+                }
+                for (name, version), package_cves in packages.items()
+            ]
+        }
+
         reporter.add(
             issue_type,
             tool_name,
@@ -243,6 +294,8 @@ def node_parse_resolvables(upgradable_dependencies, reporter, project_name):
             location,
             recommendation,
             raw_output = {upgrade_key: upgrade_details},
+            cve_value = ", ".join(cves) if cves else "n/a",
+            custom = custom
         )
 
     return len(upgradable_dependencies)
@@ -255,6 +308,18 @@ def __parse_node(logger, issue_holder, json_object):
 
     if len(json_object["vulnerabilities"]) > 0:
 
+        # Map Snyk vulnerability ids to their CVEs and the packages (and versions) they were found in, so we can report
+        # them against the dependencies they affect rather than the parent package being upgraded
+        cves_by_id = {}
+        packages_by_id = {}
+        for vulnerability in json_object["vulnerabilities"]:
+            cves_by_id[vulnerability["id"]] = vulnerability.get("identifiers", {}).get("CVE", [])
+            if "packageName" in vulnerability and "version" in vulnerability:
+                packages = packages_by_id.setdefault(vulnerability["id"], [])
+                package = (vulnerability["packageName"], vulnerability["version"])
+                if package not in packages:
+                    packages.append(package)
+
         remediation_key = json_object["remediation"]
         if "unresolved" in remediation_key:
             unresolved_dependencies = remediation_key["unresolved"]
@@ -264,24 +329,32 @@ def __parse_node(logger, issue_holder, json_object):
         if "upgrade" in remediation_key:
             upgradable_dependencies = remediation_key["upgrade"]
             if len(upgradable_dependencies) > 0:
-                resolve_count = node_parse_resolvables(upgradable_dependencies, issue_holder, project_name)    
+                resolve_count = node_parse_resolvables(upgradable_dependencies, issue_holder, project_name, cves_by_id, packages_by_id)    
 
             logger.debug(f"> snyk: {unresolve_count + resolve_count} issues reported\n")   
         # print(remediation_key)
 
 
-def parse_node(i_file, issue_holder, logger):
+def node_parse_target(target, logger):
+    """
+    Parses a single Snyk target in isolation, returning the issues it produced.
+    Called from a worker process when a report holds multiple targets.
+    """
+
+    target_issue_holder = IssueHolder(logger)
+    __parse_node(logger, target_issue_holder, target)
+    return target_issue_holder.get_issues()
+
+
+def parse_node(i_file, issue_holder, logger, metadata):
     """
     Attempts to carry out multiple steps on a Snyk scan's output:
     1) Report dependencies that, when updated, will fix one or more vulnerabilities
     2) Report any dependencies that cannot be fixed by updating (i.e. if a dependency is at its latest version, is no longer supported, etc.)
     """
 
-    i_file_json_object = json.load(i_file)
-
-    # Sometimes snyk will report multiple files - we need to check if this is the case first
-    if isinstance(i_file_json_object, list):
-        for target in i_file_json_object:
-            __parse_node(logger, issue_holder, target)
-    else:
-        __parse_node(logger, issue_holder, i_file_json_object)
+    # Sometimes snyk will report multiple files (i.e. --all-projects) - each target is independent of the others,
+    # so they're streamed out of the file and spread across worker processes.
+    targets = iter_targets(i_file)
+    for issues in map_targets(node_parse_target, targets, metadata.workers, logger):
+        issue_holder.extend(issues)
@@ -1,28 +1,52 @@
-import json
-
 from packaging import version
 from ..constants import calculate_rating
-
-
-def parse(trivy_file, issue_holder, logger):
+from ..input.Streaming import iter_prefixed
+from ..issues.IssueHolder import IssueHolder
+from .Parallel import map_targets
+
+# Maps trivy's target types onto package ecosystems, so dependencies can be correlated with other tools' findings.
+# OS packages (debian, alpine etc.) keep their trivy type.
+ecosystems = {
+    "gomod": "golang",
+    "gobinary": "golang",
+    "npm": "npm",
+    "yarn": "npm",
+    "pnpm": "npm",
+    "node-pkg": "npm",
+    "pip": "pypi",
+    "pipenv": "pypi",
+    "poetry": "pypi",
+    "python-pkg": "pypi",
+    "bundler": "gem",
+    "gemspec": "gem",
+    "cargo": "cargo",
+    "composer": "composer",
+    "jar": "maven",
+    "pom": "maven",
+    "nuget": "nuget"
+}
+
+
+def parse_target(json_object, filename, logger):
     """
-    Goes through trivy tool output and passes issues to Reporter
+    Goes through a single trivy target (i.e. one scanned image) and returns the resulting issue.
+    Called from a worker process when a report holds multiple targets.
     """
 
     issue_type = "containers"
     tool_name = "trivy"
 
-    filename = trivy_file.name
-
-    # Load the issues into a JSON blob. The output is an element in a list, so we'll explode it out.
-    json_object = json.load(trivy_file)[0]
+    target_issue_holder = IssueHolder(logger)
 
     title = f"Container image uses vulnerable dependencies"
     location = json_object["Target"]
 
     # Chances are, the vulnerable packages are coming from the base image, so lets bunch the dependencies into one issue.
     
-    findings = json_object["Vulnerabilities"]
+    findings = json_object.get("Vulnerabilities")
+    if not findings:
+        return target_issue_holder.get_issues()
+
     highest_severity = "informational"
 
     # Get a list of all the dependency package names and sort/uniq them.
@@ -33,6 +57,10 @@ def parse(trivy_file, issue_holder, logger):
 
     sorted_issues = []
     description_issue_list = []
+    packages = []
+
+    target_type = json_object.get("Type", "")
+    ecosystem = ecosystems.get(target_type, target_type)
 
     # Go through all the findings and sort them such that we get the highest fix and severity for each finding.
     # We will also look for the greatest severity of all the packages, as this will be mapped to the parent issue.
@@ -46,6 +74,7 @@ def parse(trivy_file, issue_holder, logger):
            "severity": "unknown",
            "line": ""
         }
+        cves = []
 
         for finding in findings:
             if dependency_name == finding["PkgName"]:
@@ -58,6 +87,9 @@ def parse(trivy_file, issue_holder, logger):
 
                 if calculate_rating(dependency_information["severity"]) < calculate_rating(finding["Severity"]):
                     dependency_information["severity"] = finding["Severity"].lower()
+
+                if finding.get("VulnerabilityID", "") != "" and finding["VulnerabilityID"] not in cves:
+                    cves.append(finding["VulnerabilityID"])
             
             # Regardless of whether the packages match, we need to capture the highest severity issue in general.
             if calculate_rating(finding["Severity"]) > calculate_rating(highest_severity):
@@ -65,6 +97,14 @@ def parse(trivy_file, issue_holder, logger):
 
         description_issue_list.append(f'- {dependency_name} (severity: {dependency_information["severity"]}, installed: {dependency_information["installed"]}, fix: {dependency_information["fix"]})')
         sorted_issues.append(dependency_information)
+        packages.append(
+            {
+                "ecosystem": ecosystem,
+                "name": dependency_name,
+                "version": dependency_information["installed"],
+                "cves": cves
+            }
+        )
 
     description = "trivy identified one or more vulnerable dependencies in use by the scanned container."
     description += f"\nThe highest severity issue was of {highest_severity} risk, and this has been reflected in the overall issue's severity."
@@ -77,7 +117,7 @@ def parse(trivy_file, issue_holder, logger):
     recommendation += "Please note that this may break required features of the currently used version, and as such it is always recommended to test and assess the impact of upgrading the image(s) before deploying to production.\n\n"
     recommendation += "It may also be the case that reported dependencies were manually introduced as part of the creation of the scanned image - these may have to be manually upgraded also."
 
-    issue_holder.add(
+    target_issue_holder.add(
         issue_type,
         tool_name,
         title,
@@ -85,9 +125,35 @@ def parse(trivy_file, issue_holder, logger):
         location,
         recommendation,
         filename,
-        severity = highest_severity
+        severity = highest_severity,
+        custom = {
+            "type": "dependency",
+            "packages": packages
+        }
     )
 
+    return target_issue_holder.get_issues()
+
+
+def parse(trivy_file, issue_holder, logger, metadata):
+    """
+    Goes through trivy tool output and passes issues to Reporter
+    """
+
+    filename = trivy_file.name
+
+    # Older versions of trivy output a list of targets, newer ones wrap them in "Results".
+    # Each target (image) is independent, so they're streamed out of the file and spread across worker processes.
+    targets = (target for _, target in iter_prefixed(trivy_file, ("item", "Results.item")))
+
+    issue_count = 0
+    for issues in map_targets(parse_target, targets, metadata.workers, filename, logger):
+        issue_holder.extend(issues)
+        issue_count += len(issues)
+
+    logger.debug(f"> trivy: {issue_count} issues reported\n")
+
+
 ## this is old trivy code, reporting an issue for each dependency.
 
 # def parse(trivy_file, issue_holder, logger):
@@ -1,17 +1,11 @@
 #!/usr/bin/env python3
 
 import argparse
-import boto3
-import os
-import traceback
-
-from lib.input.ConfigHandler import ConfigHandler
-from lib.input.Loader import load_from_folder
-from lib.issues.IssueHolder import IssueHolder
-from lib.parsers.CoreParser import CoreParser
+
+from lib.api import parse_directory
+from lib.exceptions import ParserError
+from lib.input.Watcher import DEFAULT_MARKER, DEFAULT_TIMEOUT
 from lib.output.Logger import Logger
-from lib.output.Metadata import Metadata
-from lib.output.Reporter import Reporter
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -26,8 +20,8 @@ if __name__ == "__main__":
     parser.add_argument(
         "-i",
         "--input",
-        help="The directory to load security tool output from",
-        required=True
+        help="The directory to load security tool output from (not needed if --tool is given)",
+        default=None
     )
     parser.add_argument(
         "-o",
@@ -48,49 +42,100 @@ if __name__ == "__main__":
         default=""
     )
 
-    arguments = parser.parse_args()
-
-    # Create variables to store where to load and save files from/to.
-    input_folder = arguments.input
-    # If not provided, store output in the current directory (i.e. ".")
-    output_folder = arguments.output 
-    verbose = arguments.verbose
-
-    # Prepare the logger that will be used throughout
-    l = Logger(verbose)
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        help="A previous run's report (a local .csv, .jsonl or .sarif file, or s3://bucket/key) to compare against; only new issues can fail the build",
+        default=""
+    )
 
-    # Load the config file
-    if arguments.config == "" or arguments.config is None:
-        config = ConfigHandler(l, input_folder + "/.security/parser.yml")
-    else:
-        config = ConfigHandler(l, arguments.config)
+    parser.add_argument(
+        "--changed-files",
+        help="On pull request builds, only report findings in files listed (one per line) in this file",
+        default=""
+    )
+    parser.add_argument(
+        "--diff-base",
+        help="On pull request builds, only report findings in files changed since this git ref (i.e. origin/master)",
+        default=""
+    )
 
-    m = Metadata(l, config)
-    # Get the absolute path for the output folder
-    m.output_path = os.path.abspath(output_folder)
+    parser.add_argument(
+        "--cache",
+        help="A directory to cache parsed results in, so unchanged tool output isn't parsed again by later runs",
+        default=""
+    )
 
-    issue_holder = IssueHolder(l)
+    parser.add_argument(
+        "--shard",
+        help="Parse this container's share of the files (using CIRCLE_NODE_INDEX/CIRCLE_NODE_TOTAL) and save them for merge.py",
+        action="store_true"
+    )
 
-    m.input_files = load_from_folder(l, input_folder)
+    parser.add_argument(
+        "--watch",
+        help="Parse each file as soon as it has been written, finishing when the marker file appears (or on timeout)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--watch-marker",
+        help="The file written to the input directory once every scanner has finished",
+        default=DEFAULT_MARKER
+    )
+    parser.add_argument(
+        "--watch-timeout",
+        help="The number of seconds to wait for the marker file before finishing with the files written so far",
+        type=int,
+        default=DEFAULT_TIMEOUT
+    )
 
-    parser = CoreParser(l, m, issue_holder)
-    parser.parse(m.input_files)
-    parser.check_allowlists(config.allowlisted_issues)
-    if m.jira:
-        parser.check_jira()
-    
-    exit_code = parser.check_threshold(config.fail_threshold)
+    parser.add_argument(
+        "--tool",
+        help="Parse a tool's output straight from stdin (-) or a named pipe, i.e. --tool trivy - (can be repeated)",
+        nargs=2,
+        metavar=("TOOL", "SOURCE"),
+        action="append",
+        default=[]
+    )
+    parser.add_argument(
+        "--tee",
+        help="Save a compressed copy of piped tool output to the output directory as it's read (i.e. to upload to S3)",
+        choices=["gzip", "xz"],
+        default=None
+    )
 
-    # Create the reporter and generate output now
-    reporter = Reporter(l, m, issue_holder)
-    creation_success = reporter.create_csv_report()
-    reporter.generate_metadata_file()
+    arguments = parser.parse_args()
 
-    # If we have a report and we're allowed to upload to AWS, then do it
-    if creation_success and config.upload_to_aws:
-        reporter.upload_to_s3()
+    if arguments.input is None and not arguments.tool:
+        parser.error("one of -i/--input or --tool is required")
 
-    if exit_code != 0:
+    # Prepare the logger that will be used throughout
+    l = Logger(arguments.verbose)
+
+    try:
+        result = parse_directory(
+            arguments.input,
+            # If not provided, load the config file from the input directory
+            config = arguments.config or None,
+            # If not provided, store output in the current directory (i.e. ".")
+            output = arguments.output,
+            baseline = arguments.baseline,
+            changed_files = arguments.changed_files,
+            diff_base = arguments.diff_base,
+            cache = arguments.cache,
+            shard = arguments.shard,
+            watch = arguments.watch,
+            watch_marker = arguments.watch_marker,
+            watch_timeout = arguments.watch_timeout,
+            pipes = arguments.tool,
+            tee = arguments.tee,
+            logger = l
+        )
+    except ParserError as e:
+        l.critical(str(e))
+        exit(-1)
+
+    if result.exit_code != 0:
         l.warning("Exiting script with non-zero value")
-        l.warning(f"The exit code is {exit_code}")
-        exit(exit_code)
+        l.warning(f"The exit code is {result.exit_code}")
+        exit(result.exit_code)
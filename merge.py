@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import argparse
+
+from lib.api import merge_partials
+from lib.exceptions import ParserError
+from lib.output.Logger import Logger
+
+from dotenv import load_dotenv
+load_dotenv()
+
+if __name__ == "__main__":
+
+    print()
+    print("Security Output Parser - merge")
+    print("Combines the partial results saved by main.py --shard into a single report\n")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-p",
+        "--partials",
+        help="The directory to load partial results (parser_partial_*.snapshot) from",
+        required=True
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        help="The directory the original security tool output is in, to upload alongside the report (optional)",
+        default=""
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="The directory to store the parsed data to",
+        default="."
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="Sets verbose mode",
+        action="store_true"
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="Location of config file to consume",
+        default=".security/parser.yml"
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        help="A previous run's report (a local .csv, .jsonl or .sarif file, or s3://bucket/key) to compare against; only new issues can fail the build",
+        default=""
+    )
+
+    arguments = parser.parse_args()
+
+    l = Logger(arguments.verbose)
+
+    try:
+        result = merge_partials(
+            arguments.partials,
+            config = arguments.config,
+            output = arguments.output,
+            path = arguments.input,
+            baseline = arguments.baseline,
+            logger = l
+        )
+    except ParserError as e:
+        l.critical(str(e))
+        exit(-1)
+
+    if result.exit_code != 0:
+        l.warning("Exiting script with non-zero value")
+        l.warning(f"The exit code is {result.exit_code}")
+        exit(result.exit_code)
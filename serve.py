@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import lzma
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+import yaml
+import zlib
+
+from aiohttp import web
+from concurrent.futures import ProcessPoolExecutor
+
+from lib.api import METADATA_OVERRIDES, parse_directory
+from lib.exceptions import ParserError
+from lib.input.ConfigHandler import ConfigHandler
+from lib.issues.Allowlist import Allowlist
+from lib.output.Logger import Logger
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Uploaded tool output must be named as load_from_folder expects, optionally with a compression suffix
+UPLOAD_NAME = re.compile(r"^(results_[\w.-]+\.(?:json|sarif))(\.gz|\.xz)?$")
+CHUNK_SIZE = 64 * 1024
+
+# Job ids, which name each job's directory of reports
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+# Set in each worker process by warm_worker
+worker_logger = None
+worker_config = None
+worker_allowlist = None
+
+
+class Decompressor:
+    """
+    Incrementally decompresses an uploaded file as its chunks arrive (gzip, including multi-member files, or xz).
+    """
+
+    def __init__(self, suffix):
+        self.suffix = suffix
+        self.decompressor = self.__new()
+
+
+    def __new(self):
+        if self.suffix == ".gz":
+            return zlib.decompressobj(wbits=31)
+        return lzma.LZMADecompressor()
+
+
+    def decompress(self, chunk):
+        """
+        Yields the chunk's decompressed data in pieces of at most CHUNK_SIZE bytes, so an upload that expands to far more
+        than it was sent as (i.e. a compression bomb) can be stopped before it's all written.
+        """
+
+        while True:
+            data = self.decompressor.decompress(chunk, CHUNK_SIZE)
+            if data:
+                yield data
+
+            if self.suffix == ".gz":
+                if self.decompressor.eof and self.decompressor.unused_data:
+                    # gzip files can hold several members, one after the other
+                    chunk = self.decompressor.unused_data
+                    self.decompressor = self.__new()
+                elif self.decompressor.unconsumed_tail:
+                    chunk = self.decompressor.unconsumed_tail
+                else:
+                    return
+            else:
+                if self.decompressor.eof or self.decompressor.needs_input:
+                    return
+                chunk = b""
+
+
+    def flush(self):
+        if self.suffix == ".gz":
+            return self.decompressor.flush()
+        return b""
+
+
+def warm_worker(verbose, config):
+    """
+    Runs once in each worker process, so the parsers and their dependencies (boto3, jira, bs4, markdown) are imported
+    once rather than per request. S3 and JIRA clients are then cached by the worker across the requests it handles, and
+    the config and its compiled allowlist are built once and shared by every job.
+    """
+
+    global worker_logger, worker_config, worker_allowlist
+
+    import lib.issues.Jira
+    import lib.output.Uploader
+    import lib.parsers.snyk
+
+    # The server configures logging; the workers just log through it
+    worker_logger = Logger(verbose, console=False)
+
+    worker_config = ConfigHandler(worker_logger, config)
+    worker_allowlist = Allowlist(worker_config.allowlisted_issues)
+
+
+def run_job(input_folder, output_folder, metadata, include_issues):
+    """
+    Parses one upload in a worker process, returning a summary the server can send back.
+    """
+
+    result = parse_directory(
+        input_folder,
+        config = worker_config,
+        output = output_folder,
+        metadata = metadata,
+        allowlist = worker_allowlist,
+        logger = worker_logger
+    )
+
+    summary = {
+        "exit_code": result.exit_code,
+        "issue_count": result.metadata.payload.get("issue_count", 0),
+        "reports": [os.path.basename(report) for report in result.reports]
+    }
+
+    if include_issues:
+        summary["issues"] = [issue.dictionary() for issue in result.issues]
+
+    return summary
+
+
+class Server:
+    """
+    Accepts tool output over HTTP and parses it in a pool of warm worker processes.
+
+    At most `jobs` uploads are parsed at once and at most `queue` more wait for a worker; any further requests are turned
+    away with a 503 before their body is read, so clients back off rather than the server buffering their uploads.
+
+    Each job's reports are kept for `retention` seconds, after which their directory is removed.
+    """
+
+    def __init__(self, logger, config, output_folder, jobs, queue, max_upload_size, retention, verbose):
+        self.l = logger
+        # Each job already runs in its own worker process, so its parsers don't start a pool of their own (which would
+        # otherwise be jobs * cpu_count processes under load)
+        config = dict(config, workers=1)
+        self.output_folder = output_folder
+        self.max_upload_size = max_upload_size
+        self.retention = retention
+        self.expiry_task = None
+        # Jobs still being received or parsed, whose reports aren't removed however old their directory is
+        self.active_jobs = set()
+
+        self.jobs = jobs
+        self.queue = queue
+        self.semaphore = asyncio.Semaphore(jobs)
+        # Requests that have been accepted (uploading, waiting for a worker or being parsed)
+        self.accepted = 0
+
+        self.pool = ProcessPoolExecutor(max_workers=jobs, initializer=warm_worker, initargs=(verbose, config))
+
+
+    async def __receive(self, request, input_folder):
+        """
+        Streams each uploaded file to the input folder, decompressing it on the way if needed. The upload size limit
+        applies to the decompressed size.
+        """
+
+        reader = await request.multipart()
+        received = 0
+        names = set()
+
+        while True:
+            part = await reader.next()
+            if part is None:
+                break
+
+            match = UPLOAD_NAME.match(os.path.basename(part.filename or ""))
+            if match is None:
+                raise web.HTTPBadRequest(text=f"Unsupported upload {part.filename!r} - expected a results_*.json or results_*.sarif file (optionally .gz or .xz)\n")
+
+            name, suffix = match.groups()
+            if name in names:
+                raise web.HTTPBadRequest(text=f"{name} was uploaded more than once\n")
+            names.add(name)
+
+            decompressor = Decompressor(suffix) if suffix else None
+
+            with open(os.path.join(input_folder, name), "wb") as input_file:
+                while True:
+                    chunk = await part.read_chunk(CHUNK_SIZE)
+                    if not chunk:
+                        break
+
+                    for data in (decompressor.decompress(chunk) if decompressor else [chunk]):
+                        received += len(data)
+                        if received > self.max_upload_size:
+                            raise web.HTTPRequestEntityTooLarge(max_size=self.max_upload_size, actual_size=received)
+
+                        input_file.write(data)
+
+                if decompressor:
+                    input_file.write(decompressor.flush())
+
+        if not names:
+            raise web.HTTPBadRequest(text="No tool output was uploaded\n")
+
+        return len(names)
+
+
+    async def parse(self, request):
+        if self.accepted >= self.jobs + self.queue:
+            raise web.HTTPServiceUnavailable(headers={"Retry-After": "5"}, text="Too many uploads are being parsed - try again later\n")
+
+        metadata = {key: value for key, value in request.query.items() if key in METADATA_OVERRIDES}
+        include_issues = request.query.get("issues", "false").lower() == "true"
+
+        job_id = uuid.uuid4().hex
+        output_folder = os.path.join(self.output_folder, job_id)
+        input_folder = tempfile.mkdtemp(prefix="parser_upload_")
+
+        self.accepted += 1
+        self.active_jobs.add(job_id)
+        try:
+            file_count = await self.__receive(request, input_folder)
+            self.l.info(f"Job {job_id}: received {file_count} file(s)")
+
+            async with self.semaphore:
+                loop = asyncio.get_running_loop()
+                summary = await loop.run_in_executor(
+                    self.pool, run_job, input_folder, output_folder, metadata, include_issues
+                )
+        except ParserError as e:
+            raise web.HTTPUnprocessableEntity(text=f"{e}\n")
+        finally:
+            self.accepted -= 1
+            self.active_jobs.discard(job_id)
+            shutil.rmtree(input_folder, ignore_errors=True)
+
+        self.l.info(f"Job {job_id}: {summary['issue_count']} issue(s), exit code {summary['exit_code']}")
+
+        summary["id"] = job_id
+        summary["reports"] = [f"/reports/{job_id}/{report}" for report in summary["reports"]]
+        return web.Response(text=json.dumps(summary, default=str), content_type="application/json")
+
+
+    async def report(self, request):
+        job_id = request.match_info["job_id"]
+        name = request.match_info["name"]
+
+        location = os.path.join(self.output_folder, job_id, name)
+        if not JOB_ID.fullmatch(job_id) or os.path.basename(name) != name or not os.path.isfile(location):
+            raise web.HTTPNotFound()
+
+        return web.FileResponse(location)
+
+
+    async def health(self, request):
+        return web.json_response({
+            "jobs": self.jobs,
+            "accepted": self.accepted,
+            "queue": self.queue
+        })
+
+
+    def expire_reports(self):
+        """
+        Removes the directories of jobs whose reports are older than the retention period, returning how many were removed.
+        """
+
+        cutoff = time.time() - self.retention
+        expired = 0
+
+        for entry in os.scandir(self.output_folder):
+            if not entry.is_dir() or not JOB_ID.fullmatch(entry.name) or entry.name in self.active_jobs:
+                continue
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+
+            shutil.rmtree(entry.path, ignore_errors=True)
+            expired += 1
+
+        return expired
+
+
+    async def __expire(self):
+        """
+        Periodically removes expired reports, so the output folder doesn't grow for as long as the server runs.
+        """
+
+        loop = asyncio.get_running_loop()
+        while True:
+            expired = await loop.run_in_executor(None, self.expire_reports)
+            if expired:
+                self.l.info(f"Removed the reports of {expired} expired job(s)")
+            await asyncio.sleep(min(self.retention, 60))
+
+
+    async def start(self, app):
+        if self.retention > 0:
+            self.expiry_task = asyncio.create_task(self.__expire())
+
+
+    async def close(self, app):
+        if self.expiry_task is not None:
+            self.expiry_task.cancel()
+        self.pool.shutdown()
+
+
+    def application(self):
+        app = web.Application()
+        app.add_routes([
+            web.post("/parse", self.parse),
+            web.get("/reports/{job_id}/{name}", self.report),
+            web.get("/health", self.health)
+        ])
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.close)
+        return app
+
+
+if __name__ == "__main__":
+
+    print()
+    print("Security Output Parser - server")
+    print("Parses tool output uploaded over HTTP, keeping the parsers warm between uploads\n")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="Location of config file to apply to every upload",
+        default=".security/parser.yml"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="The directory to store each upload's reports to (in a directory named after its job id)",
+        default="."
+    )
+    parser.add_argument(
+        "--host",
+        help="The address to listen on",
+        default="127.0.0.1"
+    )
+    parser.add_argument(
+        "--port",
+        help="The port to listen on",
+        type=int,
+        default=8080
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="The number of uploads parsed at once, each in its own worker process",
+        type=int,
+        default=os.cpu_count() or 1
+    )
+    parser.add_argument(
+        "-q",
+        "--queue",
+        help="The number of uploads that can wait for a worker before further uploads are turned away",
+        type=int,
+        default=16
+    )
+    parser.add_argument(
+        "--max-upload-size",
+        help="The largest upload accepted, in MB",
+        type=int,
+        default=1024
+    )
+    parser.add_argument(
+        "--retention",
+        help="How long each upload's reports are kept for, in minutes (0 keeps them until they're removed by hand)",
+        type=int,
+        default=60
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="Sets verbose mode",
+        action="store_true"
+    )
+
+    arguments = parser.parse_args()
+
+    l = Logger(arguments.verbose)
+
+    # The config is read once, rather than for every upload; each worker then loads it (and compiles its allowlist) once
+    config = {}
+    if os.path.exists(arguments.config):
+        with open(arguments.config) as config_file:
+            config = yaml.load(config_file, Loader=yaml.FullLoader) or {}
+        l.info(f"Loaded configuration from {arguments.config}")
+    else:
+        l.warning(f"{arguments.config} not found - using the default configuration")
+
+    output_folder = os.path.abspath(arguments.output)
+    os.makedirs(output_folder, exist_ok=True)
+
+    server = Server(
+        l,
+        config,
+        output_folder,
+        arguments.jobs,
+        arguments.queue,
+        arguments.max_upload_size * 1024 * 1024,
+        arguments.retention * 60,
+        arguments.verbose
+    )
+
+    web.run_app(server.application(), host=arguments.host, port=arguments.port)
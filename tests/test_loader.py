@@ -0,0 +1,20 @@
+from lib.input.Loader import load_from_folder, select_shard
+from lib.output.Logger import Logger
+
+
+def test_shards_order_same_sized_files_by_their_path(tmp_path):
+    # The same file name, with the same size, in several subdirectories
+    for directory in ("a", "b", "c", "d"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "results_trivy.json").write_text("{}")
+
+    l = Logger(console=False)
+    chosen = []
+    for loaded_files in (load_from_folder(l, tmp_path), reversed(load_from_folder(l, tmp_path))):
+        selected_files = select_shard(l, list(loaded_files), 0, 2, tmp_path)
+        chosen.append(sorted(loaded_file.name for loaded_file in selected_files))
+        for selected_file in selected_files:
+            selected_file.close()
+
+    assert chosen[0] == chosen[1]
+    assert chosen[0] == [str(tmp_path / "a" / "results_trivy.json"), str(tmp_path / "c" / "results_trivy.json")]
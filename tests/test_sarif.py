@@ -0,0 +1,79 @@
+import io
+import json
+
+from types import SimpleNamespace
+
+import pytest
+
+from lib.input import Streaming
+from lib.issues.IssueHolder import IssueHolder
+from lib.output.Logger import Logger
+from lib.parsers import sarif
+
+SEMGREP_RULES = [
+    {
+        "id": "python.lang.security.eval",
+        "shortDescription": {"text": "Eval detected"},
+        "defaultConfiguration": {"level": "warning"}
+    }
+]
+
+
+def result(rule_id, uri, line, **fields):
+    return {
+        "ruleId": rule_id,
+        **fields,
+        "message": {"text": "Found something"},
+        "locations": [{"physicalLocation": {"artifactLocation": {"uri": uri}, "region": {"startLine": line}}}]
+    }
+
+
+def parse(document):
+    logger = Logger(console=False)
+    issue_holder = IssueHolder(logger)
+    metadata = SimpleNamespace(repository_url="", commit_hash="", working_directory="/home/circleci/project")
+    sarif.parse(io.StringIO(json.dumps(document)), issue_holder, logger, metadata)
+    return issue_holder.get_issues()
+
+
+@pytest.fixture(params=["ijson", "json"])
+def streaming(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(Streaming, "ijson", None)
+    elif Streaming.ijson is None:
+        pytest.skip("ijson is not installed")
+
+
+def test_results_before_tool(streaming):
+    semgrep_result = result("python.lang.security.eval", "app.py", 3)
+
+    document = {
+        "runs": [
+            # Results are allowed to come before the tool that produced them
+            {"results": [semgrep_result], "tool": {"driver": {"name": "Semgrep OSS", "rules": SEMGREP_RULES}}},
+            {"tool": {"driver": {"name": "gosec"}}, "results": [result("G101", "main.go", 4, level="error")]}
+        ]
+    }
+
+    issues = parse(document)
+
+    assert [(issue.tool_name, issue.title, issue.severity) for issue in issues] == [
+        ("semgrep", "Eval detected", "medium"),
+        ("gosec", "G101", "high")
+    ]
+
+
+def test_rules_do_not_leak_between_runs(streaming):
+    semgrep_result = result("python.lang.security.eval", "app.py", 3)
+
+    document = {
+        "runs": [
+            {"tool": {"driver": {"name": "Semgrep OSS", "rules": SEMGREP_RULES}}, "results": []},
+            # A run without a driver is reported as a generic tool, without the previous run's rules
+            {"results": [semgrep_result]}
+        ]
+    }
+
+    issues = parse(document)
+
+    assert [(issue.tool_name, issue.title) for issue in issues] == [("sarif", "python.lang.security.eval")]
@@ -0,0 +1,36 @@
+import pytest
+
+from lib.constants import relative_path
+from lib.input.Scope import Scope
+
+WORKING_DIRECTORY = "/home/circleci/project"
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/home/circleci/project/cmd/main.go", "cmd/main.go"),
+    ("file:///home/circleci/project/cmd/main.go", "cmd/main.go"),
+    ("./cmd/main.go", "cmd/main.go"),
+    ("cmd/main.go", "cmd/main.go"),
+    # Only a leading working directory is stripped, not a path that contains its name
+    ("myproject/main.go", "myproject/main.go"),
+    ("vendor/project/main.go", "vendor/project/main.go"),
+    ("/home/circleci/projects/main.go", "/home/circleci/projects/main.go")
+])
+def test_relative_path(path, expected):
+    assert relative_path(path, WORKING_DIRECTORY) == expected
+
+
+def test_relative_path_expands_home(monkeypatch):
+    monkeypatch.setenv("HOME", "/home/circleci")
+
+    assert relative_path("/home/circleci/project/cmd/main.go", "~/project") == "cmd/main.go"
+    assert relative_path("~/project/cmd/main.go", "~/project") == "cmd/main.go"
+
+
+def test_scope_keeps_paths_containing_the_working_directory_name():
+    scope = Scope(["myproject/main.go\n", "cmd/main.go\n"], WORKING_DIRECTORY)
+
+    assert scope.contains("myproject/main.go")
+    assert scope.contains("/home/circleci/project/cmd/main.go")
+    assert not scope.contains("main.go")
+    assert scope.skipped == 1